@@ -0,0 +1,58 @@
+"""
+Production gunicorn profile, picked up automatically from the working
+directory (``gunicorn stock_management.wsgi``). Every value can be
+overridden from the environment or ``.env``. Module level names are read as
+gunicorn settings, hence ``decouple.config`` rather than ``config``.
+"""
+import multiprocessing
+import os
+
+import decouple
+
+bind = f"0.0.0.0:{decouple.config('PORT', default='8000')}"
+
+# Threads let a worker keep serving while a request waits on the database
+worker_class = decouple.config('GUNICORN_WORKER_CLASS', default='gthread')
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
+
+# Load the application once in the master: workers fork already initialised
+# and share its memory copy-on-write
+preload_app = decouple.config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Recycle workers to bound memory growth; the jitter keeps them from all
+# restarting at once
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+accesslog = '-'
+errorlog = '-'
+
+# Reuse database connections between requests; each worker thread keeps one
+os.environ.setdefault('DB_CONN_MAX_AGE', '60')
+
+WARMUP = decouple.config('GUNICORN_WARMUP', default=True, cast=bool)
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded application is imported, before
+    # the first fork
+    if WARMUP and server.cfg.preload_app:
+        from inventory.warmup import warm_up_code
+        warm_up_code()
+
+
+def post_fork(server, worker):
+    if not WARMUP:
+        return
+    if not server.cfg.preload_app:
+        from inventory.warmup import warm_up_code
+        warm_up_code()
+    # Primes the database's cache and checks it is reachable; request threads
+    # still open their own connections
+    from inventory.warmup import warm_up_database
+    warm_up_database()
@@ -1,6 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Product, Category, Supplier, StockLog
+from django.db.models import F
+from .models import (
+    User, Product, Category, Supplier, StockLog, OutboxEvent, WebhookEndpoint,
+    SlowQuery, ReportJob, ReconciliationRun, ProductStockShard, Location, IdempotencyKey,
+    ProductLocationStock, ProductValuation, StockAlert
+)
+from .alerts import detect_crossing, record_alerts
+from .valuation import value_quantity_change
 
 
 @admin.register(User)
@@ -27,39 +34,102 @@ class SupplierAdmin(admin.ModelAdmin):
     search_fields = ('name', 'contact_person', 'email')
 
 
+class ProductStockShardInline(admin.TabularInline):
+    model = ProductStockShard
+    fields = ('index', 'quantity')
+    readonly_fields = ('index', 'quantity')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class ProductLocationStockInline(admin.TabularInline):
+    model = ProductLocationStock
+    fields = ('location', 'quantity', 'min_stock_level')
+    # Quantities change through stock updates, which keep the rollup in step
+    readonly_fields = ('location', 'quantity')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class ProductValuationInline(admin.StackedInline):
+    model = ProductValuation
+    fields = ('quantity', 'average_cost', 'fifo_value', 'updated_at')
+    # Kept by stock movements; `manage.py rebuild_valuation` recomputes it
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    search_fields = ('code', 'name', 'address')
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'sku', 'category', 'supplier', 'quantity', 'price', 'is_low_stock', 'is_active')
     list_filter = ('category', 'supplier', 'is_active', 'created_at')
     search_fields = ('name', 'sku', 'description')
-    readonly_fields = ('created_at', 'updated_at', 'stock_value')
+    # Striping is changed with `manage.py fold_stock_shards --sku ... --shards N`
+    readonly_fields = ('created_at', 'updated_at', 'stock_value', 'stock_shards', 'version')
+    inlines = [ProductStockShardInline, ProductLocationStockInline, ProductValuationInline]
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'description', 'sku')
         }),
         ('Inventory Details', {
-            'fields': ('quantity', 'price', 'min_stock_level', 'is_active')
+            'fields': ('quantity', 'price', 'min_stock_level', 'is_active', 'stock_shards')
         }),
         ('Categories & Suppliers', {
             'fields': ('category', 'supplier')
         }),
         ('Tracking', {
-            'fields': ('created_by', 'last_modified_by', 'created_at', 'updated_at'),
+            'fields': ('created_by', 'last_modified_by', 'created_at', 'updated_at', 'version'),
             'classes': ('collapse',)
         })
     )
 
+    def get_readonly_fields(self, request, obj=None):
+        # A striped product's quantity is the folded total of its shards
+        if obj is not None and obj.is_striped:
+            return self.readonly_fields + ('quantity',)
+        return self.readonly_fields
+
     def save_model(self, request, obj, form, change):
         if not change:  # Creating new object
             obj.created_by = request.user
         obj.last_modified_by = request.user
+        if change:
+            # Admin saves win, but API clients holding the old version get a 409
+            obj.version = F('version') + 1
         super().save_model(request, obj, form, change)
+        obj.refresh_from_db(fields=['version'])
+        if 'quantity' in form.changed_data:
+            value_quantity_change(obj, form.initial.get('quantity', 0) if change else 0, obj.quantity)
+        if not change or {'quantity', 'min_stock_level'} & set(form.changed_data):
+            # Admin saves do not lock the row; a stale crossing repeats the last alert and is dropped
+            record_alerts([detect_crossing(
+                obj,
+                form.initial.get('quantity') if change else None,
+                obj.quantity,
+                form.initial.get('min_stock_level') if change else None
+            )])
 
 
 @admin.register(StockLog)
 class StockLogAdmin(admin.ModelAdmin):
-    list_display = ('product', 'action', 'quantity_change', 'new_quantity', 'user', 'timestamp')
-    list_filter = ('action', 'timestamp', 'user')
+    list_display = ('product', 'action', 'quantity_change', 'new_quantity', 'location', 'user', 'timestamp')
+    list_filter = ('action', 'timestamp', 'user', 'location')
     search_fields = ('product__name', 'product__sku', 'reason')
     readonly_fields = ('timestamp',)
     date_hierarchy = 'timestamp'
@@ -68,4 +138,100 @@ class StockLogAdmin(admin.ModelAdmin):
         return False
 
     def has_change_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'is_active', 'last_event_id', 'failure_count', 'next_attempt_at')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'url')
+    readonly_fields = ('failure_count', 'next_attempt_at', 'last_error', 'created_at')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'created_at')
+    list_filter = ('event_type',)
+    readonly_fields = ('event_type', 'payload', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'duration_ms', 'view_name', 'method', 'path', 'has_plan')
+    list_filter = ('view_name', 'method')
+    search_fields = ('sql', 'path')
+    readonly_fields = (
+        'sql', 'params', 'duration_ms', 'view_name', 'method', 'path',
+        'query_params', 'plan', 'created_at'
+    )
+    date_hierarchy = 'created_at'
+
+    @admin.display(boolean=True)
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'created_by', 'created_at', 'finished_at', 'row_count')
+    list_filter = ('kind', 'status')
+    search_fields = ('id', 'created_by__username')
+    readonly_fields = (
+        'kind', 'params', 'status', 'created_by', 'created_at', 'started_at',
+        'finished_at', 'result_file', 'row_count', 'error', 'expires_at'
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'started_at', 'status', 'incremental', 'products_checked', 'logs_checked',
+        'chain_breaks', 'invalid_entries', 'quantity_mismatches', 'overallocated', 'repaired'
+    )
+    list_filter = ('status', 'incremental', 'repair')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ('product', 'kind', 'quantity', 'min_stock_level', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product', 'stock_log')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'response_status', 'created_at', 'expires_at')
+    search_fields = ('key', 'user__username')
+    readonly_fields = ('user', 'key', 'fingerprint', 'response_status', 'response_body', 'created_at', 'expires_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,74 @@
+"""
+Edge-triggered low stock alerts.
+
+A product is low on stock while ``quantity <= min_stock_level``, as in the
+low stock report. Every write that moves a product's quantity or minimum
+level compares the state before and after, and records a ``StockAlert``
+only when the product crosses the level: ``low_stock`` going down,
+``restocked`` coming back above. A write that crosses nothing costs no
+query.
+
+Alerts are written in the writer's transaction. A crossing that repeats the
+product's last alert is dropped, so each product's alerts alternate even
+when a write saw a stale state (admin saves do not lock the row).
+"""
+from django.db.models import OuterRef, Subquery
+
+from .models import Product, StockAlert
+
+
+def detect_crossing(product, quantity_before, quantity_after, min_before=None, stock_log=None):
+    """
+    Unsaved alert if going from ``quantity_before`` to ``quantity_after``
+    crosses the product's minimum stock level, else None. ``min_before`` is
+    the level before an edit changed it; ``quantity_before`` is None for a
+    new product.
+    """
+    min_after = product.min_stock_level
+    if min_before is None:
+        min_before = min_after
+    was_low = quantity_before is not None and quantity_before <= min_before
+    is_low = quantity_after <= min_after
+    if was_low == is_low:
+        return None
+    return StockAlert(
+        product=product,
+        kind='low_stock' if is_low else 'restocked',
+        quantity=quantity_after,
+        min_stock_level=min_after,
+        stock_log=stock_log
+    )
+
+
+def record_alerts(alerts):
+    """Save crossings in order, except those repeating the product's last alert"""
+    alerts = [alert for alert in alerts if alert is not None]
+    if not alerts:
+        return []
+
+    last_alert = StockAlert.objects.filter(product=OuterRef('pk')).order_by('-id').values('kind')[:1]
+    last_kind = dict(
+        Product.objects.filter(pk__in={alert.product_id for alert in alerts})
+        .annotate(last_kind=Subquery(last_alert)).values_list('pk', 'last_kind')
+    )
+    recorded = []
+    for alert in alerts:
+        if last_kind.get(alert.product_id) == alert.kind:
+            continue
+        last_kind[alert.product_id] = alert.kind
+        recorded.append(alert)
+    StockAlert.objects.bulk_create(recorded)
+    return recorded
+
+
+def record_stock_log_alerts(stock_logs):
+    """
+    Crossings of stock logs as they enter the ledger, in ledger order.
+    Pending logs of striped products are checked when they are folded.
+    """
+    return record_alerts(
+        detect_crossing(
+            stock_log.product, stock_log.previous_quantity, stock_log.new_quantity, stock_log=stock_log
+        )
+        for stock_log in stock_logs if stock_log.is_folded
+    )
@@ -0,0 +1,309 @@
+import asyncio
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum, Count, Q, F
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Product, Category, Supplier, StockLog
+from .serializers import ProductSerializer, StockLogSerializer, InventoryReportSerializer
+from .permissions import RoleBasedPermission, StockLogPermission
+from .instrumentation import query_budget
+from .throttling import throttle_cost
+from .pagination import estimated_count
+from .conditional import make_etag, record_cache_result
+from . import views
+
+
+def error_data(exc):
+    # Same body shape as DRF's exception handler
+    if isinstance(exc.detail, (list, dict)):
+        return exc.detail
+    return {'detail': exc.detail}
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    response = HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+    )
+    for key, value in (headers or {}).items():
+        response[key] = value
+    return response
+
+
+def check_permission(request, permission, view=None):
+    """
+    Authenticate, authorize and throttle like ``APIView.initial`` does;
+    returns an error response or None
+    """
+    try:
+        if not permission.has_permission(request, None):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied()
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, view):
+                raise exceptions.Throttled(throttle.wait())
+        return None
+    except exceptions.APIException as exc:
+        headers = {}
+        if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+            headers['Retry-After'] = '%d' % exc.wait
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticator = request.authenticators[0] if request.authenticators else None
+            header = authenticator.authenticate_header(request) if authenticator else None
+            if header:
+                headers['WWW-Authenticate'] = header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        return json_response(error_data(exc), exc.status_code, headers)
+
+
+def async_api_view(permission_class, fallback=None):
+    """
+    Async GET endpoint with the same authentication, permission and JSON
+    rendering as the DRF views.
+
+    Other methods are handed to the synchronous ``fallback`` view, so a
+    list-create URL can serve reads asynchronously and keep its writes.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                if fallback is None:
+                    return json_response(
+                        {'detail': f'Method "{request.method}" not allowed.'},
+                        status.HTTP_405_METHOD_NOT_ALLOWED
+                    )
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+
+            drf_request = Request(
+                request,
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            )
+            # Authentication hits the database, so it runs in a thread
+            error = await sync_to_async(check_permission)(drf_request, permission_class(), wrapper)
+            if error is not None:
+                return error
+
+            try:
+                return await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return json_response(error_data(exc), exc.status_code)
+
+        # DRF performs its own CSRF check for session authentication
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def filtered_queryset(request, view_class, **kwargs):
+    """Apply the configured filter backends with the sync view's settings"""
+    view = view_class(request=request, format_kwarg=None, args=(), kwargs=kwargs)
+    queryset = view.get_queryset()
+    for backend in api_settings.DEFAULT_FILTER_BACKENDS:
+        queryset = backend().filter_queryset(request, queryset, view)
+    return queryset
+
+
+async def paginate(request, queryset, serializer_class):
+    """Async EstimatedCountPagination: count and page rows without blocking the loop"""
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page_number = int(request.query_params.get('page', 1))
+        if page_number < 1:
+            raise ValueError
+    except ValueError:
+        raise exceptions.NotFound('Invalid page.')
+
+    offset = (page_number - 1) * page_size
+    # One row past the page tells whether another follows an estimated count
+    (count, count_is_estimate), rows = await asyncio.gather(
+        sync_to_async(estimated_count)(queryset),
+        aslist(queryset[offset:offset + page_size + 1]),
+    )
+    if page_number > 1 and not rows:
+        raise exceptions.NotFound('Invalid page.')
+    has_next = len(rows) > page_size if count_is_estimate else offset + page_size < count
+    rows = rows[:page_size]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page_number + 1) if has_next else None
+    if page_number == 1:
+        previous_url = None
+    elif page_number == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page_number - 1)
+
+    return {
+        'count': count,
+        'count_is_estimate': count_is_estimate,
+        'next': next_url,
+        'previous': previous_url,
+        'results': serializer_class(rows, many=True, context={'request': request}).data,
+    }
+
+
+async def aslist(queryset):
+    return [obj async for obj in queryset]
+
+
+@query_budget(views.ProductListCreateView.query_budget)
+@async_api_view(RoleBasedPermission, fallback=views.ProductListCreateView.as_view())
+async def product_list(request):
+    """
+    Async product listing with the same filters, search and ordering
+    """
+    queryset = filtered_queryset(request, views.ProductListCreateView)
+    # Same validator as ConditionalListMixin, so both modes agree on the ETag
+    state = await queryset.order_by().aaggregate(**views.ProductListCreateView.etag_aggregates)
+    etag = make_etag(request.get_full_path(), sorted(state.items()))
+
+    response = get_conditional_response(request, etag=etag)
+    record_cache_result(response)
+    if response is None:
+        response = json_response(await paginate(request, queryset, ProductSerializer))
+    response['ETag'] = etag
+    return response
+
+
+@query_budget(views.StockLogListView.query_budget)
+@async_api_view(StockLogPermission)
+async def stock_log_list(request):
+    """
+    Async stock log listing
+    """
+    queryset = filtered_queryset(request, views.StockLogListView)
+    return json_response(await paginate(request, queryset, StockLogSerializer))
+
+
+@query_budget(5)
+@throttle_cost('report')
+@async_api_view(RoleBasedPermission)
+async def low_stock_products(request):
+    """
+    Get products with low stock levels
+    """
+    products = await aslist(
+        Product.objects.filter(
+            is_active=True,
+            quantity__lte=F('min_stock_level')
+        ).select_related(
+            'category', 'supplier', 'created_by', 'last_modified_by'
+        ).order_by('quantity')
+    )
+    return json_response({
+        'count': len(products),
+        'products': ProductSerializer(products, many=True).data
+    })
+
+
+@query_budget(12)
+@throttle_cost('report')
+@async_api_view(RoleBasedPermission)
+async def inventory_report(request):
+    """
+    Generate comprehensive inventory report; the independent aggregates are
+    awaited together
+    """
+    category = request.GET.get('category')
+    supplier = request.GET.get('supplier')
+
+    products_queryset = Product.objects.all()
+    if category:
+        products_queryset = products_queryset.filter(category__name__icontains=category)
+    if supplier:
+        products_queryset = products_queryset.filter(supplier__name__icontains=supplier)
+    active_products_qs = products_queryset.filter(is_active=True)
+    week_ago = timezone.now() - timedelta(days=7)
+
+    (
+        total_products, active_products, low_stock_products, out_of_stock_products,
+        stock_value_data, categories_count, suppliers_count, recent_changes
+    ) = await asyncio.gather(
+        products_queryset.acount(),
+        active_products_qs.acount(),
+        active_products_qs.filter(quantity__lte=F('min_stock_level')).acount(),
+        active_products_qs.filter(quantity=0).acount(),
+        active_products_qs.aaggregate(
+            total_value=Sum(F('quantity') * F('price'), default=0),
+            total_quantity=Sum('quantity', default=0)
+        ),
+        Category.objects.acount(),
+        Supplier.objects.acount(),
+        StockLog.objects.filter(timestamp__gte=week_ago).acount(),
+    )
+
+    serializer = InventoryReportSerializer(data={
+        'total_products': total_products,
+        'active_products': active_products,
+        'inactive_products': total_products - active_products,
+        'low_stock_products': low_stock_products,
+        'out_of_stock_products': out_of_stock_products,
+        'total_stock_value': stock_value_data['total_value'] or 0,
+        'total_quantity': stock_value_data['total_quantity'] or 0,
+        'categories_count': categories_count,
+        'suppliers_count': suppliers_count,
+        'recent_stock_changes': recent_changes,
+    })
+    serializer.is_valid()
+
+    return json_response({
+        'report': serializer.data,
+        'generated_at': timezone.now(),
+        'filters': {
+            'category': category,
+            'supplier': supplier
+        }
+    })
+
+
+@query_budget(10)
+@throttle_cost('report')
+@async_api_view(RoleBasedPermission)
+async def dashboard_stats(request):
+    """
+    Get key dashboard statistics
+    """
+    active = Product.objects.filter(is_active=True)
+    yesterday = timezone.now() - timedelta(days=1)
+
+    (
+        total_products, low_stock_count, out_of_stock_count,
+        inventory_value, recent_stock_movements, top_categories
+    ) = await asyncio.gather(
+        active.acount(),
+        active.filter(quantity__lte=F('min_stock_level')).acount(),
+        active.filter(quantity=0).acount(),
+        active.aaggregate(total=Sum(F('quantity') * F('price'), default=0)),
+        StockLog.objects.filter(timestamp__gte=yesterday).acount(),
+        aslist(Category.objects.annotate(
+            product_count=Count('products', filter=Q(products__is_active=True))
+        ).order_by('-product_count')[:5]),
+    )
+
+    return json_response({
+        'total_products': total_products,
+        'low_stock_count': low_stock_count,
+        'out_of_stock_count': out_of_stock_count,
+        'inventory_value': inventory_value['total'],
+        'recent_stock_movements': recent_stock_movements,
+        'top_categories': [
+            {'name': cat.name, 'product_count': cat.product_count}
+            for cat in top_categories
+        ],
+        'timestamp': timezone.now()
+    })
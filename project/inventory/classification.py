@@ -0,0 +1,84 @@
+"""
+ABC (Pareto) classification of the active products.
+
+Products are ranked by stock value (``quantity * price``) or by units sold
+over the last ``ABC_SALES_DAYS`` days. A product is class A while the
+products ranked above it make up less than ``ABC_CLASS_A_PERCENT`` of the
+total, B below ``ABC_CLASS_B_PERCENT``, and C after that. The running
+totals are window functions, so the whole ranking is one query.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value, When, Window
+)
+from django.db.models.functions import Cast, Coalesce, NullIf, RowNumber
+from django.utils import timezone
+
+from .models import Product, StockLog
+
+BASES = ('value', 'sales')
+
+
+def units_sold(since):
+    sales = StockLog.objects.filter(
+        product=OuterRef('pk'), action='sale', timestamp__gte=since
+    ).order_by().values('product').annotate(units=Sum(-F('quantity_change'))).values('units')
+    return Cast(Coalesce(Subquery(sales), 0), FloatField())
+
+
+def classify(basis, days=None):
+    """
+    Active products annotated with ``metric``, ``share`` and
+    ``cumulative_share`` (percentages), ``rank`` and ``abc``, in rank order
+    """
+    if basis == 'value':
+        metric = ExpressionWrapper(F('quantity') * F('price'), output_field=FloatField())
+    else:
+        since = timezone.now() - timedelta(days=days or settings.ABC_SALES_DAYS)
+        metric = units_sold(since)
+
+    ranking = [F('metric').desc(), F('id').asc()]
+    total = NullIf(Window(Sum('metric')), 0.0)
+    return Product.objects.filter(is_active=True).annotate(metric=metric).annotate(
+        rank=Window(RowNumber(), order_by=ranking),
+        share=F('metric') * 100.0 / total,
+        cumulative_share=Window(Sum('metric'), order_by=ranking) * 100.0 / total,
+    ).annotate(
+        abc=Case(
+            # Nothing in stock or nothing sold ranks last whatever the totals
+            When(metric__lte=0, then=Value('C')),
+            # cumulative_share - share is the share of the products ranked above
+            When(cumulative_share__lt=F('share') + settings.ABC_CLASS_A_PERCENT, then=Value('A')),
+            When(cumulative_share__lt=F('share') + settings.ABC_CLASS_B_PERCENT, then=Value('B')),
+            default=Value('C'),
+        )
+    ).order_by('rank')
+
+
+def refresh_abc_classes(basis=None, days=None, batch_size=500):
+    """
+    Store each product's class in ``Product.abc_class``; inactive products
+    are cleared. Only changed rows are written, and their ``updated_at`` is
+    bumped so delta sync and list ETags pick the change up; the detail ETag
+    includes the class itself. Returns the number of products changed.
+    """
+    ids_by_class = defaultdict(list)
+    for pk, abc in classify(basis or settings.ABC_BASIS, days).values_list('pk', 'abc').iterator():
+        ids_by_class[abc].append(pk)
+
+    now = timezone.now()
+    changed = 0
+    with transaction.atomic():
+        for abc, ids in ids_by_class.items():
+            for start in range(0, len(ids), batch_size):
+                changed += Product.objects.filter(pk__in=ids[start:start + batch_size]).exclude(
+                    abc_class=abc
+                ).update(abc_class=abc, updated_at=now)
+        changed += Product.objects.filter(is_active=False).exclude(abc_class='').update(
+            abc_class='', updated_at=now
+        )
+    return changed
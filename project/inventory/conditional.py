@@ -0,0 +1,97 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import metrics
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the given validator parts"""
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def epoch_seconds(value):
+    return int(value.timestamp()) if value else None
+
+
+def record_cache_result(response):
+    result = 'hit' if response is not None and response.status_code == 304 else 'miss'
+    metrics.increment('cache_requests_total', {'cache': 'etag', 'result': result})
+
+
+class ConditionalListMixin:
+    """
+    Conditional GET for list views.
+
+    The ETag is derived from a single aggregate over the filtered queryset, so
+    an unchanged collection is answered with 304 before pagination and
+    serialization run.
+    """
+    etag_aggregates = {
+        'last_modified': Max('updated_at'),
+        'count': Count('pk'),
+    }
+
+    def get_etag_state(self, queryset):
+        return queryset.order_by().aggregate(**self.etag_aggregates)
+
+    def list(self, request, *args, **kwargs):
+        state = self.get_etag_state(self.filter_queryset(self.get_queryset()))
+        # The query string selects the page, filters and ordering of the body
+        etag = make_etag(request.get_full_path(), sorted(state.items()))
+
+        response = get_conditional_response(request, etag=etag)
+        record_cache_result(response)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+
+class ConditionalObjectMixin:
+    """
+    Conditional GET and If-Match preconditions for detail views
+    """
+
+    def get_object(self):
+        # Fetched once per request: validators and the update share the instance
+        if not hasattr(self, '_conditional_object'):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+
+    def get_validators(self, obj):
+        return make_etag(obj.pk, obj.updated_at), obj.updated_at
+
+    def set_validators(self, response, obj):
+        etag, last_modified = self.get_validators(obj)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(epoch_seconds(last_modified))
+        return response
+
+    def evaluate_preconditions(self, request, obj):
+        etag, last_modified = self.get_validators(obj)
+        return get_conditional_response(
+            request, etag=etag, last_modified=epoch_seconds(last_modified)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = self.evaluate_preconditions(request, instance)
+        record_cache_result(response)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, instance)
+
+    def update(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # If-Match / If-Unmodified-Since mismatches answer 412
+        response = self.evaluate_preconditions(request, instance)
+        if response is not None:
+            return response
+
+        response = super().update(request, *args, **kwargs)
+        return self.set_validators(response, instance)
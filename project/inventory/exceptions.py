@@ -0,0 +1,30 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class VersionConflict(APIException):
+    """
+    The row changed between the client's read and its write
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The product was modified by someone else. Reload it and retry."
+    default_code = 'version_conflict'
+
+    def __init__(self, current_version=None):
+        super().__init__({'error': self.default_detail})
+        if current_version is not None:
+            # Set after init, which would turn it into a string
+            self.detail['current_version'] = current_version
+
+
+class StockUpdateTimeout(APIException):
+    """
+    A group-committed stock update was not acknowledged in time; it may
+    still commit
+    """
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = "Stock update not acknowledged in time; check the stock log before retrying"
+    default_code = 'stock_update_timeout'
+
+    def __init__(self):
+        super().__init__({'error': self.default_detail})
@@ -1,11 +1,24 @@
+from datetime import timedelta
+
 import django_filters
+from django.conf import settings
+from django.db import models
 from django.db.models import Q
-from .models import Product, StockLog
+from django.utils import timezone
+from .models import Product, StockAlert, StockLog
+
+
+def uppercase_exact(queryset, name, value):
+    """
+    SKUs and location codes are stored uppercase, so an exact match on the
+    uppercased value finds the same rows as iexact and can use the index
+    """
+    return queryset.filter(**{name: value.upper().strip()})
 
 
 class ProductFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
-    sku = django_filters.CharFilter(lookup_expr='iexact')
+    sku = django_filters.CharFilter(method=uppercase_exact)
     category = django_filters.CharFilter(field_name='category__name', lookup_expr='icontains')
     supplier = django_filters.CharFilter(field_name='supplier__name', lookup_expr='icontains')
     price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
@@ -15,12 +28,13 @@ class ProductFilter(django_filters.FilterSet):
     low_stock = django_filters.BooleanFilter(method='filter_low_stock')
     out_of_stock = django_filters.BooleanFilter(method='filter_out_of_stock')
     is_active = django_filters.BooleanFilter()
+    abc_class = django_filters.ChoiceFilter(choices=Product.ABC_CLASS_CHOICES)
 
     class Meta:
         model = Product
         fields = [
             'name', 'sku', 'category', 'supplier', 'price_min', 'price_max',
-            'quantity_min', 'quantity_max', 'low_stock', 'out_of_stock', 'is_active'
+            'quantity_min', 'quantity_max', 'low_stock', 'out_of_stock', 'is_active', 'abc_class'
         ]
 
     def filter_low_stock(self, queryset, name, value):
@@ -36,20 +50,41 @@ class ProductFilter(django_filters.FilterSet):
 
 class StockLogFilter(django_filters.FilterSet):
     product = django_filters.CharFilter(field_name='product__name', lookup_expr='icontains')
-    product_sku = django_filters.CharFilter(field_name='product__sku', lookup_expr='iexact')
+    product_sku = django_filters.CharFilter(field_name='product__sku', method=uppercase_exact)
     action = django_filters.ChoiceFilter(choices=StockLog.ACTION_CHOICES)
     user = django_filters.CharFilter(field_name='user__username', lookup_expr='icontains')
+    location = django_filters.CharFilter(field_name='location__code', method=uppercase_exact)
     date_from = django_filters.DateTimeFilter(field_name='timestamp', lookup_expr='gte')
     date_to = django_filters.DateTimeFilter(field_name='timestamp', lookup_expr='lte')
     quantity_change_positive = django_filters.BooleanFilter(method='filter_quantity_change_positive')
 
     class Meta:
         model = StockLog
-        fields = ['product', 'product_sku', 'action', 'user', 'date_from', 'date_to', 'quantity_change_positive']
+        fields = [
+            'product', 'product_sku', 'action', 'user', 'location', 'date_from', 'date_to',
+            'quantity_change_positive'
+        ]
 
     def filter_quantity_change_positive(self, queryset, name, value):
         if value is True:
             return queryset.filter(quantity_change__gt=0)
         elif value is False:
             return queryset.filter(quantity_change__lt=0)
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+class StockAlertFilter(django_filters.FilterSet):
+    product = django_filters.NumberFilter(field_name='product_id')
+    product_sku = django_filters.CharFilter(field_name='product__sku', method=uppercase_exact)
+    kind = django_filters.ChoiceFilter(choices=StockAlert.KIND_CHOICES)
+    after = django_filters.NumberFilter(method='filter_after')
+
+    class Meta:
+        model = StockAlert
+        fields = ['product', 'product_sku', 'kind', 'after']
+
+    def filter_after(self, queryset, name, value):
+        # Alerts still committing can hold lower ids than committed ones; the
+        # newest are left for the next poll so none is skipped
+        horizon = timezone.now() - timedelta(seconds=settings.STOCK_ALERT_SETTLE_SECONDS)
+        return queryset.filter(id__gt=value, created_at__lte=horizon)
@@ -0,0 +1,237 @@
+"""
+Group commit for stock updates (``STOCK_GROUP_COMMIT``).
+
+Each request thread hands its stock update to a per-process writer thread
+and waits. The writer collects what arrives within
+``STOCK_GROUP_COMMIT_WINDOW_MS`` and applies it in one transaction: one
+locked fetch of the products, one ``bulk_create`` of the logs and one
+commit for the whole batch. A caller is answered once its batch has
+committed, so an acknowledged update is as durable as with the regular
+path.
+
+Updates naming a location, updates of striped products and updates made
+inside a transaction (such as those sent with an ``Idempotency-Key``) take
+the regular path.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import metrics
+from .alerts import record_stock_log_alerts
+from .exceptions import StockUpdateTimeout
+from .locations import allocated_by_product
+from .models import Product, StockLog
+from .valuation import load_cost_states, save_cost_states
+from .webhooks import enqueue_stock_events
+
+logger = logging.getLogger(__name__)
+
+
+class PendingUpdate:
+    def __init__(self, product, validated_data, user):
+        self.product = product
+        self.validated_data = validated_data
+        self.user = user
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def resolve(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+
+class GroupCommitWriter:
+    """
+    Writer thread applying queued stock updates in batches. Started on the
+    first ``submit`` in each process, so forked workers get their own.
+    """
+
+    def __init__(self, window_ms=None, max_batch=None, timeout=None):
+        self.window = (window_ms if window_ms is not None else settings.STOCK_GROUP_COMMIT_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.STOCK_GROUP_COMMIT_MAX_BATCH
+        self.timeout = timeout or settings.STOCK_GROUP_COMMIT_TIMEOUT
+        self.queue = queue.Queue()
+        self.pid = None
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.updates = 0
+
+    def submit(self, product, validated_data, user):
+        """Queue a stock update and wait until its batch commits"""
+        self.ensure_started()
+        pending = PendingUpdate(product, validated_data, user)
+        self.queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            # The update may still commit; the caller must not assume either way
+            raise StockUpdateTimeout()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # A thread inherited through fork is not running; start afresh
+                self.queue = queue.Queue()
+                threading.Thread(target=self.run, name='stock-group-commit', daemon=True).start()
+                self.pid = os.getpid()
+
+    def stop(self):
+        """Let the writer finish what is queued and exit"""
+        if self.pid == os.getpid():
+            self.queue.put(None)
+            self.pid = None
+
+    def run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                connection.close()
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    # Stop after this batch
+                    self.queue.put(None)
+                    break
+                batch.append(pending)
+
+            close_old_connections()
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    results = apply_batch(batch)
+            except Exception as e:
+                logger.exception("Group commit of %d stock updates failed", len(batch))
+                for pending in batch:
+                    pending.resolve(error=e)
+                continue
+
+            self.batches += 1
+            self.updates += len(batch)
+            metrics.increment('stock_group_commit_batches_total', {})
+            metrics.increment('stock_group_commit_updates_total', {}, len(batch))
+            metrics.observe('stock_group_commit_seconds', {}, time.perf_counter() - started)
+            for pending, (result, error) in zip(batch, results):
+                pending.resolve(result, error)
+
+
+def apply_batch(batch):
+    """
+    Apply queued updates in arrival order; must run inside a transaction.
+    Returns ``(product, stock_log)`` or ``(None, error)`` per update: an
+    update that would take stock below 0 is rejected on its own.
+    """
+    product_ids = sorted({pending.product.pk for pending in batch})
+    if not connection.features.has_select_for_update and not getattr(connection, 'begins_immediate', False):
+        # No row locks (SQLite): take the database write lock before reading
+        Product.objects.filter(pk__in=product_ids).update(updated_at=F('updated_at'))
+    products = {
+        product.pk: product
+        for product in Product.objects.select_for_update(no_key=True)
+        .filter(pk__in=product_ids).order_by('pk')
+    }
+    allocated = allocated_by_product(product_ids)
+
+    now = timezone.now()
+    results = []
+    stock_logs = []
+    for pending in batch:
+        product = products.get(pending.product.pk)
+        if product is None:
+            results.append((None, serializers.ValidationError("Product not found")))
+            continue
+        data = pending.validated_data
+        change = data['quantity_change']
+        if product.quantity + change < allocated.get(product.pk, 0):
+            unassigned = product.quantity - allocated.get(product.pk, 0)
+            results.append((None, serializers.ValidationError(
+                f"Cannot reduce stock below 0. Current stock: {unassigned}, Requested change: {change}"
+            )))
+            continue
+
+        stock_log = StockLog(
+            product=product,
+            action=data['action'],
+            quantity_change=change,
+            previous_quantity=product.quantity,
+            new_quantity=product.quantity + change,
+            reason=data.get('reason', ''),
+            reference_number=data.get('reference_number', ''),
+            unit_cost=data.get('unit_cost'),
+            user=pending.user
+        )
+        product.quantity += change
+        product.last_modified_by = pending.user
+        product.updated_at = now
+        # Read under the lock, so a plain increment is safe
+        product.version += 1
+        stock_logs.append(stock_log)
+        results.append(((stock_log, product.version), None))
+
+    if not stock_logs:
+        return results
+
+    changed = {stock_log.product_id: products[stock_log.product_id] for stock_log in stock_logs}
+    Product.objects.bulk_update(
+        list(changed.values()), ['quantity', 'last_modified_by', 'updated_at', 'version']
+    )
+    StockLog.objects.bulk_create(stock_logs)
+
+    logs_by_product = defaultdict(list)
+    for stock_log in stock_logs:
+        logs_by_product[stock_log.product_id].append(stock_log)
+    states = load_cost_states(
+        list(changed.values()),
+        {pid: logs[0].previous_quantity for pid, logs in logs_by_product.items()}
+    )
+    for pid, logs in logs_by_product.items():
+        for stock_log in logs:
+            states[pid].apply(stock_log)
+    save_cost_states(states.values())
+    record_stock_log_alerts(stock_logs)
+    enqueue_stock_events(stock_logs)
+
+    # Every caller gets the product as its own update left it
+    answered = []
+    for pending, (applied, error) in zip(batch, results):
+        if error is not None:
+            answered.append((None, error))
+            continue
+        stock_log, version = applied
+        product = pending.product
+        product.quantity = stock_log.new_quantity
+        product.updated_at = now
+        product.version = version
+        product.last_modified_by = pending.user
+        answered.append(((product, stock_log), None))
+    return answered
+
+
+writer = GroupCommitWriter()
+
+
+def submit_stock_update(product, validated_data, user):
+    return writer.submit(product, validated_data, user)
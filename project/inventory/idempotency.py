@@ -0,0 +1,144 @@
+"""
+Idempotency keys for writes (``Idempotency-Key`` header).
+
+The key is claimed by inserting its row in the transaction that makes the
+write, and the response is stored by that same transaction, so a write and
+its stored response commit together or not at all. A retry finds the row
+and gets the stored response without the view running again.
+
+A duplicate sent while the first request is still running blocks on the
+row's unique index (on SQLite, on the database write lock) until the first
+one commits, then gets its response. If the first one rolls back, the
+duplicate runs instead.
+
+Responses of 409, 429 and 5xx are not stored and their transaction is
+rolled back, as is everything when the view raises: the key stays free
+for a retry.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import metrics
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+UNSTORED_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def claim(user, key, fingerprint):
+    """Insert the key's row, or return None when it already exists"""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            )
+    except IntegrityError:
+        return None
+
+
+def replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return Response(
+            {'error': f'{HEADER} was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    metrics.increment('idempotent_replays_total', {})
+    response = Response(stored.response_body, status=stored.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent_response(request, handler):
+    """
+    Answer ``request`` with ``handler()``, or with the stored response when
+    its ``Idempotency-Key`` was used before
+    """
+    key = request.headers.get(HEADER)
+    if key is None or not request.user.is_authenticated:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    fingerprint = request_fingerprint(request)
+    with transaction.atomic():
+        record = claim(request.user, key, fingerprint)
+        if record is None:
+            # Only reached once the transaction holding the row has finished
+            stored = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if stored is not None and stored.expires_at > timezone.now():
+                return replay(stored, fingerprint)
+            IdempotencyKey.objects.filter(
+                user=request.user, key=key, expires_at__lte=timezone.now()
+            ).delete()
+            record = claim(request.user, key, fingerprint)
+            if record is None:
+                return Response(
+                    {'error': f'A request with this {HEADER} is in progress'},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+        response = handler()
+        if response.status_code >= 500 or response.status_code in UNSTORED_STATUSES:
+            transaction.set_rollback(True)
+            return response
+        record.response_status = response.status_code
+        if response.data is not None:
+            record.response_body = json.loads(JSONRenderer().render(response.data))
+        record.save(update_fields=['response_status', 'response_body'])
+    return response
+
+
+def idempotent(view):
+    """
+    Honour ``Idempotency-Key`` on a function view. Apply below
+    ``@permission_classes``, so only authenticated, permitted requests claim
+    keys.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return idempotent_response(request, lambda: view(request, *args, **kwargs))
+    return wrapper
+
+
+class IdempotentCreateMixin:
+    """
+    ``Idempotency-Key`` on the ``create`` of generic views. Validation
+    errors are stored like any other 400, as function views return them.
+    """
+
+    def create(self, request, *args, **kwargs):
+        def handler():
+            try:
+                # A savepoint, so a rejected create stores its 400 and nothing else
+                with transaction.atomic():
+                    return super(IdempotentCreateMixin, self).create(request, *args, **kwargs)
+            except serializers.ValidationError as exc:
+                return self.handle_exception(exc)
+
+        return idempotent_response(request, handler)
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,219 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+from .slow_queries import report_slow_query
+
+logger = logging.getLogger(__name__)
+
+# A context variable rather than a thread-local: async views run their ORM
+# calls in executor threads, which inherit the request's context
+_stats = ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """
+    Declare the maximum number of SQL queries a view may run per request.
+
+    Class-based views can set a ``query_budget`` attribute instead. Apply
+    above ``@api_view`` so the budget lands on the generated view class.
+    """
+    def decorator(view):
+        target = getattr(view, 'cls', view)
+        target.query_budget = max_queries
+        return view
+    return decorator
+
+
+def view_query_budget(view_func):
+    view = getattr(view_func, 'view_class', None) or view_func
+    return getattr(view, 'query_budget', None)
+
+
+class RequestStats:
+    """
+    Per-request measurements collected by the instrumentation middleware
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self._query_budget = None
+        self._budget_resolved = False
+        self.query_shapes = Counter()
+        self.violations = set()
+        # Set to a list to capture an SQL timeline (request profiling)
+        self.query_log = None
+
+    @property
+    def query_budget(self):
+        # Resolved lazily: the URL is only resolved once the middleware chain ran
+        if not self._budget_resolved:
+            match = getattr(self.request, 'resolver_match', None)
+            if match is not None:
+                self._query_budget = view_query_budget(match.func)
+                self._budget_resolved = True
+        return self._query_budget
+
+    def check_query(self, sql):
+        """
+        Enforce the view's query budget and flag repeated identical SELECTs,
+        the signature of an N+1 lookup
+        """
+        budget = self.query_budget
+        if budget is not None and self.query_count > budget:
+            self.violation('budget', f"{self.query_count} queries exceed the budget of {budget}")
+
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            self.query_shapes[sql] += 1
+            if self.query_shapes[sql] == settings.QUERY_REPEAT_THRESHOLD:
+                self.violation('repeated', f"Same query ran {self.query_shapes[sql]} times: {sql[:200]}")
+
+    def violation(self, kind, message):
+        message = f"{self.request.method} {self.request.path}: {message}"
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        if kind not in self.violations:
+            self.violations.add(kind)
+            logger.warning(message)
+
+
+def current_stats():
+    """Stats of the request being served in this context, if any"""
+    return _stats.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing every query of the current request"""
+    stats = current_stats()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        stats.query_count += 1
+        stats.query_time += duration
+        if stats.query_log is not None:
+            stats.query_log.append((start - stats.started, duration, sql, params))
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            report_slow_query(stats.request, context['connection'].alias, sql, params, duration)
+    # Only after a successful execute: a violation must not mask the query's own error
+    stats.check_query(sql)
+    return result
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    """
+    Instrument every database connection once; the wrapper is a no-op
+    outside an instrumented request
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializer_timer():
+    stats = current_stats()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """
+    Attribute ``to_representation`` time to the current request.
+
+    List serializers call the child once per item, so totals cover
+    ``many=True`` responses too.
+    """
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class InstrumentationMiddleware:
+    """
+    Records latency, SQL and serialization metrics per URL name and method
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats = RequestStats(request)
+        token = _stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+
+        self.record(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats = RequestStats(request)
+        token = _stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _stats.reset(token)
+
+        self.record(request, response, stats)
+        return response
+
+    def record(self, request, response, stats):
+        labels = {'view': view_label(request), 'method': request.method}
+        metrics.increment('http_requests_total', {**labels, 'status': response.status_code})
+        metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - stats.started)
+        metrics.increment('db_queries_total', labels, stats.query_count)
+        metrics.increment('db_query_duration_seconds_total', labels, stats.query_time)
+        metrics.increment('serializer_duration_seconds_total', labels, stats.serializer_time)
+        if not response.streaming:
+            metrics.increment('http_response_size_bytes_total', labels, len(response.content))
+        for kind in stats.violations:
+            metrics.increment('query_budget_violations_total', {**labels, 'kind': kind})
+        metrics.flush()
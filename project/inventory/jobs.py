@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ReportJob
+from .reports import build_inventory_report, export_products, export_stock_logs
+
+logger = logging.getLogger(__name__)
+
+
+def write_inventory_report(file, params):
+    json.dump(build_inventory_report(**params), file, cls=DjangoJSONEncoder)
+    return None
+
+
+# kind -> (file extension, content type, writer)
+JOB_RUNNERS = {
+    'inventory_report': ('json', 'application/json', write_inventory_report),
+    'products_export': ('csv', 'text/csv', export_products),
+    'stock_logs_export': ('csv', 'text/csv', export_stock_logs),
+}
+
+
+def job_result_path(job):
+    return os.path.join(settings.REPORT_JOB_DIR, job.result_file)
+
+
+def job_content_type(job):
+    return JOB_RUNNERS[job.kind][1]
+
+
+def claim_next_job():
+    """
+    Move the oldest queued job to running and return it.
+
+    The conditional UPDATE is the claim: when several workers race for the
+    same job only one of them updates a row, the others try the next job.
+    """
+    while True:
+        job_id = (
+            ReportJob.objects.filter(status='queued')
+            .order_by('created_at').values_list('pk', flat=True).first()
+        )
+        if job_id is None:
+            return None
+        claimed = ReportJob.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            started_at=timezone.now()
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=job_id)
+
+
+def run_job(job):
+    """Build the job's result file and record the outcome"""
+    extension, _, writer = JOB_RUNNERS[job.kind]
+    os.makedirs(settings.REPORT_JOB_DIR, exist_ok=True)
+    filename = f'{job.pk}.{extension}'
+    path = os.path.join(settings.REPORT_JOB_DIR, filename)
+    tmp_path = f'{path}.tmp'
+
+    try:
+        with open(tmp_path, 'w', newline='') as f:
+            row_count = writer(f, job.params)
+        # Downloads never see a partially written file
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.exception("Report job %s failed", job.pk)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        job.status = 'failed'
+        job.error = str(e)[:1000]
+    else:
+        job.status = 'succeeded'
+        job.result_file = filename
+        job.row_count = row_count
+
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + timedelta(seconds=settings.REPORT_JOB_TTL_SECONDS)
+    job.save(update_fields=['status', 'result_file', 'row_count', 'error', 'finished_at', 'expires_at'])
+    return job
+
+
+def fail_stale_jobs():
+    """
+    Fail jobs left running by a worker that died; they are not retried so a
+    job that crashes its worker cannot take the next one down too
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS)
+    return ReportJob.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='failed',
+        error='Worker stopped before the job finished',
+        finished_at=now,
+        expires_at=now + timedelta(seconds=settings.REPORT_JOB_TTL_SECONDS)
+    )
+
+
+def purge_expired_jobs():
+    """Delete expired jobs together with their result files"""
+    expired = list(ReportJob.objects.filter(expires_at__lt=timezone.now()))
+    for job in expired:
+        if job.result_file:
+            try:
+                os.remove(job_result_path(job))
+            except FileNotFoundError:
+                pass
+    ReportJob.objects.filter(pk__in=[job.pk for job in expired]).delete()
+    return len(expired)
+
+
+class ReportJobWorker:
+    """
+    Runs queued report jobs, at most ``concurrency`` at a time
+    """
+
+    def __init__(self, concurrency=None, interval=2.0, maintenance_interval=60.0):
+        self.concurrency = concurrency or settings.REPORT_JOB_CONCURRENCY
+        self.interval = interval
+        self.maintenance_interval = maintenance_interval
+
+    def execute(self, job):
+        try:
+            return run_job(job)
+        finally:
+            # Worker threads open their own connections
+            close_old_connections()
+
+    def maintenance(self):
+        failed = fail_stale_jobs()
+        purged = purge_expired_jobs()
+        if failed or purged:
+            logger.info("Report jobs: %d stale failed, %d expired purged", failed, purged)
+
+    def run(self, once=False):
+        """
+        Poll for jobs until interrupted. With ``once``, return when the queue
+        is drained. Returns the number of jobs run.
+        """
+        completed = 0
+        running = set()
+        last_maintenance = None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                now = time.monotonic()
+                if last_maintenance is None or now - last_maintenance >= self.maintenance_interval:
+                    self.maintenance()
+                    last_maintenance = now
+
+                while len(running) < self.concurrency:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    running.add(executor.submit(self.execute, job))
+
+                if not running:
+                    if once:
+                        return completed
+                    time.sleep(self.interval)
+                    continue
+
+                done, running = wait(running, timeout=self.interval, return_when=FIRST_COMPLETED)
+                completed += len(done)
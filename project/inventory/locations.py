@@ -0,0 +1,61 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import ProductLocationStock
+
+
+def allocated_quantity(product_ref=OuterRef('pk')):
+    """Subquery: the product's stock assigned to locations"""
+    return Coalesce(
+        Subquery(
+            ProductLocationStock.objects.filter(product=product_ref)
+            .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+        ),
+        0
+    )
+
+
+def allocated_by_product(product_ids):
+    return dict(
+        ProductLocationStock.objects.filter(product_id__in=product_ids)
+        .order_by().values('product').annotate(total=Sum('quantity'))
+        .values_list('product', 'total')
+    )
+
+
+def apply_location_change(product, location, quantity_change):
+    """
+    Change a product's stock at ``location`` without going below 0; the
+    caller changes the ``Product.quantity`` rollup in the same transaction
+    """
+    rows = ProductLocationStock.objects.filter(product=product, location=location)
+    updated = rows.filter(quantity__gte=-quantity_change).update(
+        quantity=F('quantity') + quantity_change,
+        updated_at=timezone.now()
+    )
+    if updated:
+        return
+
+    if quantity_change > 0:
+        try:
+            # Savepoint: a concurrent first restock may create the row first
+            with transaction.atomic():
+                ProductLocationStock.objects.create(
+                    product=product,
+                    location=location,
+                    quantity=quantity_change,
+                    min_stock_level=product.min_stock_level
+                )
+            return
+        except IntegrityError:
+            rows.update(quantity=F('quantity') + quantity_change, updated_at=timezone.now())
+            return
+
+    available = rows.values_list('quantity', flat=True).first() or 0
+    raise serializers.ValidationError(
+        f"Cannot reduce stock at {location.code} below 0. Current stock: {available}, "
+        f"Requested change: {quantity_change}"
+    )
@@ -0,0 +1,123 @@
+import statistics
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from inventory.group_commit import GroupCommitWriter
+from inventory.models import Product
+from inventory.reconciliation import check_range
+from inventory.serializers import StockUpdateSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare scanner-style stock updates committed one by one and in group commit batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the stock logs are recorded for")
+        parser.add_argument('--threads', type=int, default=32, help="Concurrent scanners")
+        parser.add_argument('--updates', type=int, default=50, help="Scans per scanner")
+        parser.add_argument('--products', type=int, default=10, help="Products the scans are spread over")
+        parser.add_argument('--windows', default='1,2,5,10', help="Group commit windows to compare, in ms")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        self.stdout.write(
+            f"{options['threads']} scanners x {options['updates']} sales over "
+            f"{options['products']} products ({connection.vendor})"
+        )
+        self.stdout.write(
+            f"{'mode':<12}{'updates/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'batch':>8}{'errors':>8}  ledger"
+        )
+        self.run_mode('direct', None, user, options)
+        for window in options['windows'].split(','):
+            self.run_mode(f'group {window}ms', float(window), user, options)
+
+    def run_mode(self, label, window, user, options):
+        total = options['threads'] * options['updates']
+        products = [
+            Product.objects.create(
+                name='Group commit benchmark',
+                sku=f'BENCH-{uuid.uuid4().hex[:12]}',
+                quantity=total,
+                price=Decimal('1.00'),
+                min_stock_level=0,
+                created_by=user,
+            )
+            for _ in range(options['products'])
+        ]
+        writer = GroupCommitWriter(window_ms=window) if window is not None else None
+        try:
+            latencies, errors, elapsed = self.hammer(products, writer, user, options)
+            if writer is not None:
+                writer.stop()
+
+            remaining = sum(Product.objects.filter(pk__in=[p.pk for p in products]).values_list('quantity', flat=True))
+            ledger = check_range(min(p.pk for p in products), max(p.pk for p in products) + 1)
+            consistent = (
+                remaining == total * len(products) - len(latencies)
+                and not (ledger['invalid_entries'] or ledger['chain_breaks'] or ledger['mismatches'])
+            )
+            batch = f"{writer.updates / writer.batches:.1f}" if writer is not None and writer.batches else '1'
+            latencies.sort()
+            percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+            self.stdout.write(
+                f"{label:<12}{len(latencies) / elapsed:>11.1f}{percentiles[49]:>9.1f}"
+                f"{percentiles[98]:>9.1f}{batch:>8}{errors:>8}  "
+                + (self.style.SUCCESS('consistent') if consistent else self.style.ERROR('INCONSISTENT'))
+            )
+        finally:
+            Product.objects.filter(pk__in=[p.pk for p in products]).delete()
+
+    def hammer(self, products, writer, user, options):
+        latencies = []
+        errors = []
+        barrier = threading.Barrier(options['threads'])
+
+        def scanner(offset):
+            local_products = list(Product.objects.filter(pk__in=[p.pk for p in products]).order_by('pk'))
+            data = {'action': 'sale', 'quantity_change': -1}
+            try:
+                barrier.wait()
+                for i in range(options['updates']):
+                    product = local_products[(offset + i) % len(local_products)]
+                    start = time.perf_counter()
+                    try:
+                        if writer is not None:
+                            writer.submit(product, data, user)
+                        else:
+                            StockUpdateSerializer().update_stock(product, data, user)
+                    except Exception as e:
+                        errors.append(e)
+                    else:
+                        latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=scanner, args=(i,)) for i in range(options['threads'])]
+        # The regular path, whatever STOCK_GROUP_COMMIT says
+        group_commit = settings.STOCK_GROUP_COMMIT
+        settings.STOCK_GROUP_COMMIT = False
+        start = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            settings.STOCK_GROUP_COMMIT = group_commit
+        elapsed = time.perf_counter() - start
+
+        if errors:
+            self.stderr.write(f"  first error: {errors[0]}")
+        return latencies, len(errors), elapsed
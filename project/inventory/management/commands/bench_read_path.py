@@ -0,0 +1,124 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+DEFAULT_ENDPOINTS = [
+    '/api/reports/inventory/',
+    '/api/dashboard/stats/',
+    '/api/reports/low-stock/',
+    '/api/products/',
+    '/api/stock-logs/',
+]
+
+SERVERS = {
+    'wsgi': ['stock_management.wsgi'],
+    'asgi': ['stock_management.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = "Load-test the read endpoints under the WSGI and ASGI server modes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the requests authenticate as")
+        parser.add_argument('--modes', default='wsgi,asgi', help="Server modes to compare")
+        parser.add_argument('--url', help="Benchmark an already running server instead of spawning one")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers per spawned server")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--concurrency', type=int, default=50, help="Concurrent clients")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint")
+        parser.add_argument('--endpoints', help="Comma separated paths (default: report and list endpoints)")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+        token = str(RefreshToken.for_user(user).access_token)
+        endpoints = options['endpoints'].split(',') if options['endpoints'] else DEFAULT_ENDPOINTS
+
+        if options['url']:
+            self.run_load('server', options['url'].rstrip('/'), endpoints, token, options)
+            return
+
+        for mode in options['modes'].split(','):
+            if mode not in SERVERS:
+                raise CommandError(f"Unknown mode '{mode}'")
+            server = self.start_server(mode, options)
+            try:
+                self.run_load(mode, f"http://127.0.0.1:{options['port']}", endpoints, token, options)
+            finally:
+                server.terminate()
+                server.wait()
+
+    def start_server(self, mode, options):
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--log-level', 'warning',
+        ]
+        env = os.environ.copy()
+        # Measures the server mode, not the throttle
+        env['THROTTLE_ENABLED'] = 'False'
+        if mode == 'wsgi':
+            env.pop('ASYNC_READ_PATH', None)
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+        url = f"http://127.0.0.1:{options['port']}/api/"
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(url, timeout=1)
+                return server
+            except urllib.error.HTTPError:
+                # Any HTTP answer (401/404) means the server is up
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"{mode} server did not start")
+
+    def run_load(self, mode, base_url, endpoints, token, options):
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def fetch(url):
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - start, ok
+
+        self.stdout.write(
+            f"\n{mode}: {options['concurrency']} concurrent clients, {options['requests']} requests per endpoint"
+        )
+        self.stdout.write(f"{'endpoint':<32}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for endpoint in endpoints:
+            url = base_url + endpoint
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(fetch, [url] * options['requests']))
+            elapsed = time.perf_counter() - start
+
+            latencies = sorted(duration * 1000 for duration, _ in results)
+            errors = sum(1 for _, ok in results if not ok)
+            percentiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{endpoint:<32}{len(results) / elapsed:>10.1f}{percentiles[49]:>10.1f}"
+                f"{percentiles[94]:>10.1f}{percentiles[98]:>10.1f}{errors:>8}"
+            )
@@ -0,0 +1,177 @@
+import multiprocessing
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+
+from inventory.models import Product, StockLog
+from inventory.serializers import StockUpdateSerializer
+
+
+def set_journal_mode(mode):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode = {mode}')
+        return cursor.fetchone()[0]
+
+
+def writer(tuned, product_ids, user_id, updates, barrier, results):
+    settings.SQLITE_TUNING = tuned
+    user = get_user_model().objects.get(pk=user_id)
+    products = list(Product.objects.filter(pk__in=product_ids))
+    latencies = []
+    errors = []
+    barrier.wait()
+    for _ in range(updates):
+        start = time.perf_counter()
+        try:
+            StockUpdateSerializer().update_stock(
+                random.choice(products), {'action': 'sale', 'quantity_change': -1}, user
+            )
+        except OperationalError as e:
+            errors.append(str(e))
+        else:
+            latencies.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    results.put(('write', latencies, errors))
+
+
+def reader(tuned, product_ids, barrier, stop, results):
+    """A product page and its stock log count, as the list views read them"""
+    settings.SQLITE_TUNING = tuned
+    latencies = []
+    errors = []
+    barrier.wait()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            list(Product.objects.filter(pk__in=product_ids).order_by('-created_at')[:20])
+            StockLog.objects.filter(product_id__in=product_ids).count()
+        except OperationalError as e:
+            errors.append(str(e))
+        else:
+            latencies.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    results.put(('read', latencies, errors))
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent writer and reader processes on SQLite with and without SQLITE_TUNING"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the stock logs are recorded for")
+        parser.add_argument('--writers', type=int, default=4, help="Writer processes")
+        parser.add_argument('--readers', type=int, default=4, help="Reader processes")
+        parser.add_argument('--updates', type=int, default=200, help="Stock updates per writer")
+        parser.add_argument('--products', type=int, default=20, help="Products the updates are spread over")
+        parser.add_argument('--modes', default='off,on', help="SQLITE_TUNING settings to compare")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Only meaningful on SQLite, not {connection.vendor}")
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        self.stdout.write(
+            f"{options['writers']} writer and {options['readers']} reader processes, "
+            f"{options['updates']} sales per writer over {options['products']} products"
+        )
+        self.stdout.write(
+            f"{'tuning':<8}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+            f"{'reads/s':>10}{'p99 ms':>9}{'errors':>8}  ledger"
+        )
+        # The journal mode is stored in the database file; put it back after
+        journal_mode = set_journal_mode('wal' if settings.SQLITE_TUNING else 'delete')
+        try:
+            for mode in options['modes'].split(','):
+                if mode not in ('off', 'on'):
+                    raise CommandError(f"Unknown mode '{mode}'")
+                self.run_mode(mode == 'on', user, options)
+        finally:
+            set_journal_mode(journal_mode)
+            connections.close_all()
+
+    def run_mode(self, tuned, user, options):
+        total = options['writers'] * options['updates']
+        product_ids = [
+            Product.objects.create(
+                name='SQLite benchmark',
+                sku=f'BENCH-{uuid.uuid4().hex[:12]}',
+                quantity=total,
+                price=Decimal('1.00'),
+                min_stock_level=0,
+                created_by=user,
+            ).pk
+            for _ in range(options['products'])
+        ]
+        try:
+            set_journal_mode('wal' if tuned else 'delete')
+            # Forked processes must open their own connections
+            connections.close_all()
+            writes, reads, elapsed = self.run_processes(tuned, product_ids, user, options)
+
+            write_latencies = sorted(latency for latencies, _ in writes for latency in latencies)
+            write_errors = [error for _, errors in writes for error in errors]
+            read_latencies = sorted(latency for latencies, _ in reads for latency in latencies)
+            read_errors = [error for _, errors in reads for error in errors]
+
+            remaining = Product.objects.filter(pk__in=product_ids).aggregate(total=Sum('quantity'))['total']
+            consistent = remaining == total * options['products'] - len(write_latencies)
+            self.stdout.write(
+                f"{'on' if tuned else 'off':<8}{len(write_latencies) / elapsed:>10.1f}"
+                f"{self.percentile(write_latencies, 49):>9.1f}{self.percentile(write_latencies, 98):>9.1f}"
+                f"{len(write_errors):>8}{len(read_latencies) / elapsed:>10.1f}"
+                f"{self.percentile(read_latencies, 98):>9.1f}{len(read_errors):>8}  "
+                + (self.style.SUCCESS('consistent') if consistent else self.style.ERROR('INCONSISTENT'))
+            )
+            for error in (write_errors + read_errors)[:1]:
+                self.stderr.write(f"  first error: {error}")
+        finally:
+            Product.objects.filter(pk__in=product_ids).delete()
+
+    def run_processes(self, tuned, product_ids, user, options):
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(options['writers'] + options['readers'] + 1)
+        stop = context.Event()
+        results = context.Queue()
+        writers = [
+            context.Process(
+                target=writer, args=(tuned, product_ids, user.pk, options['updates'], barrier, results)
+            )
+            for _ in range(options['writers'])
+        ]
+        readers = [
+            context.Process(target=reader, args=(tuned, product_ids, barrier, stop, results))
+            for _ in range(options['readers'])
+        ]
+        for process in writers + readers:
+            process.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+        # Drain the queue before joining: a child blocks exiting until its
+        # results are read
+        outcomes = [results.get() for _ in writers]
+        elapsed = time.perf_counter() - start
+        stop.set()
+        outcomes += [results.get() for _ in readers]
+        for process in writers + readers:
+            process.join()
+
+        writes = [(latencies, errors) for kind, latencies, errors in outcomes if kind == 'write']
+        reads = [(latencies, errors) for kind, latencies, errors in outcomes if kind == 'read']
+        return writes, reads, elapsed
+
+    def percentile(self, values, index):
+        if len(values) < 2:
+            return values[0] if values else 0
+        return statistics.quantiles(values, n=100)[index]
@@ -0,0 +1,137 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+DEFAULT_ENDPOINTS = [
+    '/api/products/',
+    '/api/products/?category=1',
+    '/api/stock-logs/',
+    '/api/categories/',
+    '/api/suppliers/',
+    '/api/reports/low-stock/',
+]
+
+# A request is "fast" once it is within this factor of the steady state p50
+FAST_FACTOR = 1.5
+
+
+class Command(BaseCommand):
+    help = "Measure how long a freshly started worker takes to serve requests at steady state speed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the requests authenticate as")
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--runs', type=int, default=3, help="Server starts per warm-up setting")
+        parser.add_argument('--steady-requests', type=int, default=30, help="Requests per endpoint for the p50")
+        parser.add_argument('--endpoints', help="Comma separated paths (default: list and report endpoints)")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+        token = str(RefreshToken.for_user(user).access_token)
+        endpoints = options['endpoints'].split(',') if options['endpoints'] else DEFAULT_ENDPOINTS
+
+        self.stdout.write(
+            f"{'warm-up':<10}{'ready ms':>10}{'first req ms':>14}{'steady p50 ms':>15}{'first fast ms':>15}"
+        )
+        for warmup in (False, True):
+            runs = [self.measure(warmup, endpoints, token, options) for _ in range(options['runs'])]
+            self.stdout.write(
+                f"{'on' if warmup else 'off':<10}"
+                + ''.join(
+                    f"{statistics.median(run[i] for run in runs):>{width}.1f}"
+                    for i, width in enumerate((10, 14, 15, 15))
+                )
+            )
+        self.stdout.write(
+            "ready: start until the first response; first req: slowest first request of the other endpoints; "
+            f"first fast: start until every endpoint has answered within {FAST_FACTOR}x its steady p50"
+        )
+
+    def measure(self, warmup, endpoints, token, options):
+        base_url = f"http://127.0.0.1:{options['port']}"
+        headers = {'Authorization': f'Bearer {token}'}
+        command = [
+            sys.executable, '-m', 'gunicorn', 'stock_management.wsgi',
+            '-c', 'gunicorn.conf.py',
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', '1',
+            '--log-level', 'warning',
+            '--access-logfile', '/dev/null',
+        ]
+        env = os.environ.copy()
+        env['GUNICORN_WARMUP'] = str(warmup)
+        # Measures start-up, not the throttle
+        env['THROTTLE_ENABLED'] = 'False'
+        env.pop('ASYNC_READ_PATH', None)
+
+        started = time.perf_counter()
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            self.wait_bound(server, options['port'])
+
+            # Round-robin passes over the endpoints, the first of which waits
+            # for the worker to boot. The first pass is what a new worker's
+            # first clients see; the second half gives the steady state
+            samples = {endpoint: [] for endpoint in endpoints}
+            for _ in range(options['steady_requests']):
+                for endpoint in endpoints:
+                    latency = self.fetch(base_url + endpoint, headers)
+                    samples[endpoint].append((latency, time.perf_counter() - started))
+        finally:
+            server.terminate()
+            server.wait()
+
+        ready = samples[endpoints[0]][0][1]
+        # The very first request includes the boot; it is counted in ready
+        first = [samples[endpoint][0][0] for endpoint in endpoints[1:]]
+        steady = {}
+        fast_at = []
+        for endpoint, endpoint_samples in samples.items():
+            steady[endpoint] = statistics.median(
+                latency for latency, _ in endpoint_samples[len(endpoint_samples) // 2:]
+            )
+            threshold = steady[endpoint] * FAST_FACTOR
+            fast_at.append(next(at for latency, at in endpoint_samples if latency <= threshold))
+
+        return (
+            ready * 1000,
+            max(first or [0]) * 1000,
+            statistics.median(steady.values()) * 1000,
+            max(fast_at) * 1000,
+        )
+
+    def wait_bound(self, server, port):
+        """Wait for the master to listen; requests then queue until the worker is up"""
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.005)
+        server.terminate()
+        raise CommandError("Server did not start")
+
+    def fetch(self, url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+        except urllib.error.HTTPError as error:
+            raise CommandError(f"GET {url}: {error.code}")
+        return time.perf_counter() - start
@@ -0,0 +1,119 @@
+import statistics
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from inventory.models import Product
+from inventory.reconciliation import check_range
+from inventory.serializers import StockUpdateSerializer
+from inventory.striping import fold_pending, set_stock_shards, shard_total
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent stock updates on one hot product: single row vs striped shards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the stock logs are recorded for")
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent writers")
+        parser.add_argument('--updates', type=int, default=100, help="Stock updates per writer")
+        parser.add_argument('--shards', type=int, default=8, help="Counter rows in striped mode")
+        parser.add_argument('--modes', default='single,striped', help="Modes to compare")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        self.stdout.write(
+            f"{options['threads']} writers x {options['updates']} sales on one product "
+            f"({connection.vendor})"
+        )
+        self.stdout.write(
+            f"{'mode':<10}{'updates/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}  ledger"
+        )
+        for mode in options['modes'].split(','):
+            if mode not in ('single', 'striped'):
+                raise CommandError(f"Unknown mode '{mode}'")
+            self.run_mode(mode, user, options)
+
+    def run_mode(self, mode, user, options):
+        total = options['threads'] * options['updates']
+        product = Product.objects.create(
+            name='Contention benchmark',
+            sku=f'BENCH-{uuid.uuid4().hex[:12]}',
+            quantity=total * 2,
+            price=Decimal('1.00'),
+            min_stock_level=0,
+            created_by=user,
+        )
+        try:
+            if mode == 'striped':
+                product = set_stock_shards(product, options['shards'])
+
+            latencies, errors, elapsed = self.hammer(product, user, options)
+            succeeded = len(latencies)
+
+            if mode == 'striped':
+                fold_pending(settle_before=timezone.now())
+            product.refresh_from_db()
+            expected = total * 2 - succeeded
+            ledger = check_range(product.pk, product.pk + 1)
+            consistent = (
+                product.quantity == expected
+                and (not product.is_striped or shard_total(product) == expected)
+                and not (ledger['invalid_entries'] or ledger['chain_breaks'] or ledger['mismatches'])
+            )
+
+            latencies.sort()
+            percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+            self.stdout.write(
+                f"{mode:<10}{succeeded / elapsed:>12.1f}{percentiles[49]:>10.1f}"
+                f"{percentiles[98]:>10.1f}{errors:>8}  "
+                + (self.style.SUCCESS('consistent') if consistent else self.style.ERROR(
+                    f'INCONSISTENT (quantity {product.quantity}, expected {expected})'
+                ))
+            )
+        finally:
+            product.delete()
+
+    def hammer(self, product, user, options):
+        latencies = []
+        errors = []
+        barrier = threading.Barrier(options['threads'])
+
+        def writer():
+            local_product = Product.objects.get(pk=product.pk)
+            try:
+                barrier.wait()
+                for _ in range(options['updates']):
+                    start = time.perf_counter()
+                    try:
+                        StockUpdateSerializer().update_stock(
+                            local_product, {'action': 'sale', 'quantity_change': -1}, user
+                        )
+                    except Exception as e:
+                        errors.append(e)
+                    else:
+                        latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if errors:
+            self.stderr.write(f"  first error: {errors[0]}")
+        return latencies, len(errors), elapsed
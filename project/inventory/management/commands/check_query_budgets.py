@@ -0,0 +1,149 @@
+import json
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from inventory.idempotency import HEADER
+from inventory.instrumentation import view_query_budget
+from inventory.models import Category, IdempotencyKey, Location, Product, Supplier
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the costliest write paths with session authentication and fail on views "
+        "that exceed their query budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Admin user the requests are made as")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            self.user = User.objects.get(username=options['username'], role='admin')
+        except User.DoesNotExist:
+            raise CommandError(f"Admin user '{options['username']}' does not exist")
+
+        # Session authentication costs more queries than JWT
+        self.client = Client(SERVER_NAME='localhost')
+        self.client.force_login(self.user)
+        self.batch = uuid.uuid4().hex[:8].upper()
+        self.products = []
+        try:
+            # Counted in full rather than stopped at the first query over budget
+            with override_settings(QUERY_BUDGET_STRICT=False):
+                results = [
+                    self.transfer_into_unvalued_product(),
+                    self.stock_update_reclaiming_a_key(),
+                    self.product_create_reclaiming_a_key(),
+                ]
+        finally:
+            for product in self.products + list(Product.objects.filter(sku__startswith=self.sku(''))):
+                product.delete()
+            IdempotencyKey.objects.filter(user=self.user, key__startswith=self.sku('')).delete()
+
+        over = 0
+        for description, path, count, budget in results:
+            line = f"POST {path} ({description}): {count} queries, budget {budget}"
+            if count > budget:
+                over += 1
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+        if over:
+            raise CommandError(f"{over} requests exceed their query budget")
+        self.stdout.write(self.style.SUCCESS("Every request is within its query budget"))
+
+    def sku(self, suffix):
+        return f'BUDGET-{self.batch}-{suffix}'
+
+    def scratch_product(self, suffix, quantity, min_stock_level):
+        """Created without a valuation row, as products from before valuation are"""
+        product = Product.objects.create(
+            name='Query budget check',
+            sku=self.sku(suffix),
+            quantity=quantity,
+            price=Decimal('1.00'),
+            min_stock_level=min_stock_level,
+            created_by=self.user,
+        )
+        self.products.append(product)
+        return product
+
+    def expired_key(self, suffix):
+        key = self.sku(suffix)
+        IdempotencyKey.objects.create(
+            user=self.user, key=key, fingerprint='', expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        return key
+
+    def post(self, description, path, data, key=None):
+        headers = {f'HTTP_{HEADER.upper().replace("-", "_")}': key} if key else {}
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            # Counted where the budget counts them: COMMIT is not an execute
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            response = self.client.post(path, json.dumps(data), content_type='application/json', **headers)
+        if response.status_code not in (200, 201):
+            raise CommandError(f"POST {path}: {response.status_code} {response.content[:200]!r}")
+        return description, path, count, view_query_budget(resolve(path).func)
+
+    def transfer_into_unvalued_product(self):
+        source = self.scratch_product('FROM', quantity=6, min_stock_level=5)
+        target = self.scratch_product('TO', quantity=0, min_stock_level=5)
+        # Gives the source a valuation with two cost layers for the transfer to consume
+        self.post(
+            'restock of the transfer source', f'/api/products/{source.pk}/update-stock/',
+            {'action': 'restock', 'quantity_change': 4, 'unit_cost': '1.50'},
+        )
+        # The source drops to its level and the target climbs above it: two alerts
+        return self.post(
+            'into an unvalued product, both crossing their minimum level',
+            '/api/stock/transfers/',
+            {'lines': [{'from_product': source.pk, 'to_product': target.pk, 'quantity': 8}]},
+        )
+
+    def stock_update_reclaiming_a_key(self):
+        product = self.scratch_product('UPDATE', quantity=0, min_stock_level=5)
+        data = {'action': 'restock', 'quantity_change': 8, 'unit_cost': '1.50'}
+        location = Location.objects.filter(is_active=True).order_by('pk').first()
+        if location is not None:
+            # The product's first stock at the location inserts its row
+            data['location'] = location.code
+        return self.post(
+            'first restock of an unvalued product at a location, crossing its minimum level, '
+            'expired Idempotency-Key',
+            f'/api/products/{product.pk}/update-stock/',
+            data,
+            key=self.expired_key('UPDATE-KEY'),
+        )
+
+    def product_create_reclaiming_a_key(self):
+        category = Category.objects.order_by('pk').first()
+        supplier = Supplier.objects.order_by('pk').first()
+        return self.post(
+            'created below its minimum level, expired Idempotency-Key',
+            '/api/products/',
+            {
+                'name': 'Query budget check',
+                'sku': self.sku('CREATE'),
+                'quantity': 0,
+                'price': '1.00',
+                'min_stock_level': 5,
+                'category': category.pk if category else None,
+                'supplier': supplier.pk if supplier else None,
+            },
+            key=self.expired_key('CREATE-KEY'),
+        )
@@ -0,0 +1,185 @@
+import itertools
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from inventory.models import Location, Product
+
+PRODUCT_FILTERS = [
+    {},
+    {'is_active': 'true'},
+    {'sku': '{sku}'},
+    {'is_active': 'true', 'low_stock': 'true'},
+    {'out_of_stock': 'true'},
+    {'quantity_min': '5'},
+    {'price_min': '1', 'price_max': '100'},
+    {'abc_class': 'A'},
+]
+PRODUCT_ORDERINGS = [None, 'created_at', 'name', '-price', 'quantity', 'sku', '-updated_at']
+
+STOCK_LOG_FILTERS = [
+    {},
+    {'action': 'sale'},
+    {'product_sku': '{sku}'},
+    {'location': '{location}'},
+    {'date_from': '2024-01-01T00:00:00Z'},
+    {'quantity_change_positive': 'true'},
+]
+STOCK_LOG_ORDERINGS = [None, 'timestamp', 'quantity_change', 'product__name']
+# Orderings by a column of a joined table: the matching rows are sorted,
+# since no index on the listed table can hold them in that order
+SORTED_ORDERINGS = {('/api/stock-logs/', 'product__name')}
+
+# Substring matches: ``?search=`` and the ``icontains`` filters. "%term%"
+# cannot be looked up in a B-tree index, so these read the searched tables in
+# full by design; they are checked so the rest of their plan is, but their
+# scans are counted rather than failed
+TEXT_SEARCH_PARAMS = {
+    '/api/products/': {'search', 'name', 'category', 'supplier'},
+    '/api/stock-logs/': {'search', 'product', 'user'},
+    '/api/locations/{location_id}/stock/': {'search'},
+}
+
+STOCK_ALERT_FILTERS = [
+    {},
+    {'kind': 'low_stock'},
+    {'product': '{product}'},
+    {'after': '1'},
+]
+STOCK_ALERT_ORDERINGS = [None, 'id']
+
+
+def combinations(path, filters, orderings):
+    for params, ordering in itertools.product(filters, orderings):
+        params = dict(params)
+        if ordering:
+            params['ordering'] = ordering
+        yield path, params
+
+
+def list_requests():
+    """Every list endpoint with each filter and ordering clients can send"""
+    yield from combinations('/api/products/', PRODUCT_FILTERS, PRODUCT_ORDERINGS)
+    yield from combinations('/api/stock-logs/', STOCK_LOG_FILTERS, STOCK_LOG_ORDERINGS)
+    for path, names in TEXT_SEARCH_PARAMS.items():
+        yield from combinations(path, [{name: '{term}'} for name in sorted(names)], [None])
+    yield from combinations('/api/products/{product}/stock-logs/', [{}, {'action': 'sale'}], [None])
+    yield from combinations('/api/stock/alerts/', STOCK_ALERT_FILTERS, STOCK_ALERT_ORDERINGS)
+    yield '/api/products/changes/', {}
+    yield '/api/reports/low-stock/', {}
+    yield '/api/categories/', {}
+    yield '/api/suppliers/', {}
+    yield from combinations(
+        '/api/locations/{location_id}/stock/', [{}, {'low_stock': 'true'}], [None, 'quantity', 'updated_at']
+    )
+
+
+def is_collection_aggregate(sql):
+    """Pagination counts and list ETags read every matching row whatever the indexes"""
+    return re.match(r'SELECT (COUNT|MAX|MIN|SUM)\(', sql.lstrip()) and 'GROUP BY' not in sql
+
+
+def walks_rowid(sql, table):
+    """An unfiltered query ordered by ``table``'s primary key, with a LIMIT"""
+    return ' WHERE ' not in sql and re.search(rf'ORDER BY "{table}"\."id" (ASC|DESC) LIMIT \d+$', sql)
+
+
+def full_scans(sql):
+    """Tables read in full by ``sql``, according to the database's planner"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[3] for row in cursor.fetchall()]
+            # "SCAN t USING [COVERING] INDEX i" walks an index in order; a bare
+            # "SCAN t" reads the whole table, unless it walks the rowid in the
+            # order asked for and stops at the LIMIT
+            scans = [
+                m.group(1) for line in plan
+                if (m := re.match(r'SCAN (\w+)$', line)) and not walks_rowid(sql, m.group(1))
+            ]
+        elif connection.vendor == 'postgresql':
+            # Tiny tables are scanned whatever the indexes; ask the planner
+            # what it would do if scanning were expensive
+            with transaction.atomic():
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                plan = [row[0] for row in cursor.fetchall()]
+            scans = [m.group(1) for line in plan if (m := re.search(r'Seq Scan on (\w+)', line))]
+        else:
+            raise CommandError(f"Plan checks are not implemented for {connection.vendor}")
+    return scans, plan
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the queries of every list, filter and ordering combination and fail on full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Admin user the requests are made as")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the plan of every flagged query")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'], role='admin')
+        except User.DoesNotExist:
+            raise CommandError(f"Admin user '{options['username']}' does not exist")
+
+        product = Product.objects.order_by('pk').first()
+        location = Location.objects.order_by('pk').first()
+        if product is None or location is None:
+            raise CommandError("Needs at least one product and one location to build the requests")
+        values = {
+            'sku': product.sku, 'product': product.pk,
+            'location': location.code, 'location_id': location.pk,
+            'term': product.name[:3],
+        }
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        checked = 0
+        aggregates = 0
+        sorts = 0
+        searches = 0
+        flagged = []
+        for template, params in list_requests():
+            text_search = bool(TEXT_SEARCH_PARAMS.get(template, set()) & params.keys())
+            path = template.format(**values)
+            params = {key: value.format(**values) for key, value in params.items()}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, params)
+            if response.status_code != 200:
+                raise CommandError(f"GET {path} {params}: {response.status_code}")
+
+            sorted_ordering = (path, params.get('ordering', '').lstrip('-')) in SORTED_ORDERINGS
+            for query in queries.captured_queries:
+                if not query['sql'].lstrip().upper().startswith('SELECT'):
+                    continue
+                checked += 1
+                scans, plan = full_scans(query['sql'])
+                if scans and is_collection_aggregate(query['sql']):
+                    aggregates += 1
+                elif scans and sorted_ordering:
+                    sorts += 1
+                elif scans and text_search:
+                    searches += 1
+                elif scans:
+                    flagged.append((path, params, scans, query['sql'], plan))
+
+        self.stdout.write(
+            f"Checked {checked} queries ({connection.vendor}); {aggregates} counts and "
+            f"ETag aggregates read their whole result set, as they must; "
+            f"{sorts} queries sort by a joined column; {searches} text searches scan the searched tables"
+        )
+        for path, params, scans, sql, plan in flagged:
+            self.stdout.write(self.style.WARNING(f"Full scan of {', '.join(scans)}: GET {path} {params}"))
+            if options['verbose_plans']:
+                self.stdout.write(f"  {sql}")
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+        if flagged:
+            raise CommandError(f"{len(flagged)} queries scan whole tables")
+        self.stdout.write(self.style.SUCCESS("No full table scans"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.webhooks import WebhookDispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver outbox stock events to the configured webhook endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Events per POST")
+        parser.add_argument('--workers', type=int, help="Endpoints delivered in parallel")
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help="Seconds to sleep when the outbox is drained"
+        )
+        parser.add_argument('--once', action='store_true', help="Deliver one batch and exit")
+
+    def handle(self, *args, **options):
+        dispatcher = WebhookDispatcher(
+            batch_size=options['batch_size'],
+            workers=options['workers']
+        )
+
+        if options['once']:
+            delivered = dispatcher.dispatch_once()
+            self.stdout.write(f"Delivered {delivered} events")
+            return
+
+        self.stdout.write("Dispatching webhooks, press Ctrl+C to stop")
+        try:
+            while True:
+                # Keep draining while there is a backlog, back off when idle
+                if not dispatcher.dispatch_once():
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Product
+from inventory.striping import fold_pending, set_stock_shards
+
+
+class Command(BaseCommand):
+    help = "Fold striped products' pending stock changes into Product.quantity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=settings.STOCK_FOLD_INTERVAL,
+            help="Seconds between folds"
+        )
+        parser.add_argument('--once', action='store_true', help="Fold once and exit")
+        parser.add_argument('--sku', help="Product to stripe or unstripe (with --shards)")
+        parser.add_argument(
+            '--shards', type=int,
+            help="Split --sku across this many counter rows (0 = back to a single row)"
+        )
+
+    def handle(self, *args, **options):
+        if options['shards'] is not None or options['sku']:
+            self.set_shards(options['sku'], options['shards'])
+            return
+
+        if options['once']:
+            folded = fold_pending()
+            self.stdout.write(f"Folded {folded} stock changes")
+            return
+
+        self.stdout.write("Folding stock shards, press Ctrl+C to stop")
+        try:
+            while True:
+                fold_pending()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def set_shards(self, sku, shards):
+        if not sku or shards is None:
+            raise CommandError("--sku and --shards are used together")
+        if shards < 0:
+            raise CommandError("--shards cannot be negative")
+        try:
+            product = Product.objects.get(sku=sku.upper())
+        except Product.DoesNotExist:
+            raise CommandError(f"Product '{sku}' does not exist")
+
+        product = set_stock_shards(product, shards)
+        if shards:
+            self.stdout.write(f"{product.sku} is striped across {shards} counter rows")
+        else:
+            self.stdout.write(f"{product.sku} is back to a single counter row")
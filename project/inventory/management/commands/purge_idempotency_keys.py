@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys whose stored responses have expired"
+
+    def handle(self, *args, **options):
+        purged = purge_expired_keys()
+        self.stdout.write(f"Purged {purged} expired idempotency keys")
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import CostLayer, Product, ProductValuation, StockLog
+from inventory.valuation import CostState, save_cost_states
+
+
+class Command(BaseCommand):
+    help = "Recompute every product's cost layers and average cost by replaying the stock ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Products rebuilt per transaction")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Stock logs fetched per round trip")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        products = 0
+        logs = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                # Locked like a stock update would, so no movement lands mid-replay
+                batch = list(
+                    Product.objects.select_for_update().filter(pk__gt=last_id)
+                    .order_by('pk')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                states = []
+                for product in batch:
+                    state, replayed = self.replay(product, options['chunk_size'])
+                    states.append(state)
+                    logs += replayed
+                CostLayer.objects.filter(product__in=batch).delete()
+                ProductValuation.objects.filter(product__in=batch).delete()
+                save_cost_states(states)
+            products += len(batch)
+            last_id = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the valuation of {products} products from {logs} stock logs "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def replay(self, product, chunk_size):
+        """Cost state of ``product`` after its folded logs, oldest first"""
+        stock_logs = (
+            StockLog.objects.filter(product=product, is_folded=True)
+            .order_by('timestamp', 'id')
+            .only('id', 'quantity_change', 'previous_quantity', 'unit_cost', 'timestamp')
+            .iterator(chunk_size=chunk_size)
+        )
+        state = None
+        replayed = 0
+        for stock_log in stock_logs:
+            if state is None:
+                state = CostState.opening(product, stock_log.previous_quantity)
+            else:
+                # Quantity edits move stock without a log
+                state.adjust_to(stock_log.previous_quantity, stock_log.timestamp)
+            state.apply(stock_log)
+            replayed += 1
+
+        if state is None:
+            return CostState.opening(product, product.quantity), 0
+        state.adjust_to(product.quantity, timezone.now())
+        return state, replayed
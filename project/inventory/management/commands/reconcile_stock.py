@@ -0,0 +1,151 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from inventory.models import ReconciliationRun
+from inventory.reconciliation import check_range, id_ranges, init_worker, repair_mismatch
+
+# Writes committing while the previous run was reading may carry an
+# earlier updated_at, so incremental runs look back a little further
+INCREMENTAL_OVERLAP = timedelta(minutes=5)
+
+
+class Command(BaseCommand):
+    help = "Verify Product.quantity against the StockLog chain and optionally repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Worker processes (default: CPU count)"
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Product ids checked per task"
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Only check products changed since the last completed run"
+        )
+        parser.add_argument(
+            '--repair', action='store_true',
+            help="Append adjustment logs so the ledger ends at Product.quantity"
+        )
+        parser.add_argument(
+            '--show', type=int, default=20,
+            help="Discrepancies of each kind to print"
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--workers and --chunk-size must be positive")
+
+        since = None
+        if options['incremental']:
+            last_run = ReconciliationRun.objects.filter(status='completed').first()
+            if last_run is None:
+                self.stdout.write("No completed run yet, checking all products")
+            else:
+                since = last_run.started_at - INCREMENTAL_OVERLAP
+
+        run = ReconciliationRun.objects.create(
+            started_at=timezone.now(),
+            incremental=options['incremental'],
+            repair=options['repair'],
+            since=since,
+        )
+        started = time.monotonic()
+        try:
+            results = self.check_ranges(id_ranges(since, options['chunk_size']), since, options['workers'])
+            repaired = self.repair_mismatches(run, results) if options['repair'] else 0
+        except BaseException:
+            run.status = 'failed'
+            run.finished_at = timezone.now()
+            run.save(update_fields=['status', 'finished_at'])
+            raise
+
+        run.status = 'completed'
+        run.finished_at = timezone.now()
+        run.products_checked = sum(r['products_checked'] for r in results)
+        run.logs_checked = sum(r['logs_checked'] for r in results)
+        run.invalid_entries = sum(len(r['invalid_entries']) for r in results)
+        run.chain_breaks = sum(len(r['chain_breaks']) for r in results)
+        run.quantity_mismatches = sum(len(r['mismatches']) for r in results)
+        run.overallocated = sum(len(r['overallocated']) for r in results)
+        run.repaired = repaired
+        run.save()
+
+        self.report(run, results, options['show'], time.monotonic() - started)
+
+    def check_ranges(self, ranges, since, workers):
+        if not ranges:
+            return []
+        if workers == 1:
+            return [check_range(lo, hi, since) for lo, hi in ranges]
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            futures = [executor.submit(check_range, lo, hi, since) for lo, hi in ranges]
+            for future in as_completed(futures):
+                results.append(future.result())
+        results.sort(key=lambda result: result['range'])
+        return results
+
+    def repair_mismatches(self, run, results):
+        reference_number = f"RECON-{run.pk}"
+        repaired = 0
+        for result in results:
+            for product_id, *_ in result['mismatches']:
+                if repair_mismatch(product_id, reference_number) is not None:
+                    repaired += 1
+        return repaired
+
+    def report(self, run, results, show, elapsed):
+        scope = f"since {run.since:%Y-%m-%d %H:%M:%S}" if run.since else "all products"
+        self.stdout.write(
+            f"Checked {run.products_checked} products and {run.logs_checked} stock logs "
+            f"({scope}) in {elapsed:.1f}s"
+        )
+
+        sections = [
+            (
+                'invalid_entries', run.invalid_entries,
+                "Logs where new_quantity != previous_quantity + quantity_change",
+                "  log {0} (product {1}): {2} {3:+d} -> {4}",
+            ),
+            (
+                'chain_breaks', run.chain_breaks,
+                "Chain breaks (previous_quantity differs from the preceding log)",
+                "  log {0} (product {1}): expected previous {2}, found {3}",
+            ),
+            (
+                'mismatches', run.quantity_mismatches,
+                "Products whose quantity differs from their last log",
+                "  product {0} ({1}): quantity {2}, ledger {3}",
+            ),
+            (
+                'overallocated', run.overallocated,
+                "Products with more stock at locations than in total",
+                "  product {0} ({1}): quantity {2}, at locations {3}",
+            ),
+        ]
+        for key, count, title, line in sections:
+            if not count:
+                continue
+            self.stdout.write(self.style.WARNING(f"{title}: {count}"))
+            rows = [row for result in results for row in result[key]]
+            for row in rows[:show]:
+                self.stdout.write(line.format(*row))
+            if count > show:
+                self.stdout.write(f"  ... and {count - show} more")
+
+        if run.repair:
+            self.stdout.write(f"Repaired {run.repaired} products (reference RECON-{run.pk})")
+        if not (run.invalid_entries or run.chain_breaks or run.quantity_mismatches or run.overallocated):
+            self.stdout.write(self.style.SUCCESS("Ledger is consistent"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from inventory.jobs import ReportJobWorker, fail_stale_jobs, purge_expired_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued report and export jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help="Jobs run in parallel")
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty"
+        )
+        parser.add_argument('--once', action='store_true', help="Run until the queue is empty and exit")
+        parser.add_argument(
+            '--purge', action='store_true',
+            help="Only delete expired jobs and their files, then exit"
+        )
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            failed = fail_stale_jobs()
+            purged = purge_expired_jobs()
+            self.stdout.write(f"Failed {failed} stale jobs, purged {purged} expired jobs")
+            return
+
+        worker = ReportJobWorker(
+            concurrency=options['concurrency'],
+            interval=options['interval']
+        )
+
+        if options['once']:
+            completed = worker.run(once=True)
+            self.stdout.write(f"Ran {completed} jobs")
+            return
+
+        self.stdout.write("Running report jobs, press Ctrl+C to stop")
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
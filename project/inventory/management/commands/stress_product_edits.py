@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from inventory.models import Product
+
+
+class Command(BaseCommand):
+    help = "Concurrent read-modify-write edits of one product, with and without If-Match"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Staff or admin user making the edits")
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent editors")
+        parser.add_argument('--edits', type=int, default=25, help="Edits per editor")
+        parser.add_argument('--modes', default='blind,if-match', help="Modes to compare")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        self.stdout.write(
+            f"{options['threads']} editors x {options['edits']} increments of min_stock_level"
+        )
+        failed = False
+        for mode in options['modes'].split(','):
+            if mode not in ('blind', 'if-match'):
+                raise CommandError(f"Unknown mode '{mode}'")
+            failed |= not self.run_mode(mode, user, options)
+        if failed:
+            raise CommandError("Updates were lost with If-Match")
+
+    def run_mode(self, mode, user, options):
+        product = Product.objects.create(
+            name='Edit stress test',
+            sku=f'EDITS-{uuid.uuid4().hex[:12].upper()}',
+            price=Decimal('1.00'),
+            min_stock_level=0,
+            created_by=user,
+        )
+        conflicts = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+        url = f'/api/products/{product.pk}/'
+
+        def editor():
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user)
+            retries = 0
+            try:
+                barrier.wait()
+                for _ in range(options['edits']):
+                    while True:
+                        # Client-side read-modify-write, like two people in a form
+                        response = client.get(url)
+                        headers = {'HTTP_IF_MATCH': response['ETag']} if mode == 'if-match' else {}
+                        response = client.patch(
+                            url, {'min_stock_level': response.data['min_stock_level'] + 1},
+                            format='json', **headers
+                        )
+                        if response.status_code == 200:
+                            break
+                        if response.status_code not in (409, 412):
+                            raise CommandError(f"Unexpected {response.status_code}: {response.data}")
+                        retries += 1
+            finally:
+                connection.close()
+                with lock:
+                    conflicts.append(retries)
+
+        threads = [threading.Thread(target=editor) for _ in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        product.refresh_from_db()
+        expected = options['threads'] * options['edits']
+        lost = expected - product.min_stock_level
+        self.stdout.write(
+            f"{mode:<10} {expected} edits in {elapsed:.1f}s, {sum(conflicts)} conflicts retried, "
+            f"final {product.min_stock_level} (expected {expected}), {lost} lost updates"
+        )
+        product.delete()
+        return mode == 'blind' or lost == 0
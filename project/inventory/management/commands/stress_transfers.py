@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventory import metrics
+from inventory.models import Product, StockLog
+from inventory.reconciliation import check_range
+from inventory.striping import fold_pending, set_stock_shards
+from inventory.transfers import transfer_stock
+
+
+class Command(BaseCommand):
+    help = "Hammer crossed stock transfers between a few products and verify the result"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User the transfers are recorded for")
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent clients")
+        parser.add_argument('--transfers', type=int, default=50, help="Transfers per client")
+        parser.add_argument('--products', type=int, default=3, help="Products stock moves between")
+        parser.add_argument('--quantity', type=int, default=100, help="Starting stock per product")
+        parser.add_argument(
+            '--striped', type=int, default=0,
+            help="Stripe the first product across this many shards"
+        )
+
+    def handle(self, *args, **options):
+        if options['products'] < 2:
+            raise CommandError("--products must be at least 2")
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        batch = uuid.uuid4().hex[:8].upper()
+        products = [
+            Product.objects.create(
+                name='Transfer stress test',
+                sku=f'STRESS-{batch}-{i}',
+                quantity=options['quantity'],
+                price=Decimal('1.00'),
+                min_stock_level=0,
+                created_by=user,
+            )
+            for i in range(options['products'])
+        ]
+        try:
+            if options['striped']:
+                products[0] = set_stock_shards(products[0], options['striped'])
+            self.run(products, user, options)
+        finally:
+            for product in products:
+                product.delete()
+
+    def run(self, products, user, options):
+        ids = [product.pk for product in products]
+        retries_before = self.retry_count()
+        outcomes = {'ok': 0, 'rejected': 0, 'failed': []}
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+
+        def client(n):
+            rng = random.Random(n)
+            try:
+                barrier.wait()
+                for _ in range(options['transfers']):
+                    # Crossed lines in random order: a naive lock order deadlocks here
+                    a, b = rng.sample(ids, 2)
+                    lines = [(a, b, rng.randint(1, 10)), (b, a, rng.randint(1, 10))]
+                    if len(ids) > 2:
+                        lines.append((rng.choice(ids), rng.choice(ids), rng.randint(1, 10)))
+                        lines = [line for line in lines if line[0] != line[1]]
+                    rng.shuffle(lines)
+                    try:
+                        transfer_stock(lines, user, reason='stress test')
+                        result = 'ok'
+                    except Exception as e:
+                        # Transfers that would go below 0 are expected to be rejected
+                        result = 'rejected' if 'below 0' in str(e) else e
+                    with lock:
+                        if isinstance(result, str):
+                            outcomes[result] += 1
+                        else:
+                            outcomes['failed'].append(result)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        fold_pending(settle_before=timezone.now())
+        quantities = dict(Product.objects.filter(pk__in=ids).values_list('pk', 'quantity'))
+        expected_total = options['quantity'] * len(ids)
+        total = sum(quantities.values())
+        logs_total = StockLog.objects.filter(product_id__in=ids).aggregate(
+            total=Sum('quantity_change', default=0)
+        )['total']
+        ledger_errors = sum(
+            len(result['invalid_entries']) + len(result['chain_breaks']) + len(result['mismatches'])
+            for result in (check_range(pid, pid + 1) for pid in ids)
+        )
+
+        self.stdout.write(
+            f"{outcomes['ok']} transfers committed, {outcomes['rejected']} rejected for insufficient "
+            f"stock, {len(outcomes['failed'])} failed, {self.retry_count() - retries_before} retries "
+            f"in {elapsed:.1f}s ({outcomes['ok'] / elapsed:.1f} transfers/s)"
+        )
+        if outcomes['failed']:
+            self.stderr.write(f"  first failure: {outcomes['failed'][0]!r}")
+        self.stdout.write(f"Quantities: {quantities}")
+
+        checks = [
+            (total == expected_total, f"total stock {total}, expected {expected_total}"),
+            (logs_total == 0, f"transfer logs net to {logs_total}, expected 0"),
+            (all(q >= 0 for q in quantities.values()), "a quantity went below 0"),
+            (ledger_errors == 0, f"{ledger_errors} ledger discrepancies"),
+            (not outcomes['failed'], "some transfers failed"),
+        ]
+        problems = [message for ok, message in checks if not ok]
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Stock conserved and ledger consistent"))
+
+    def retry_count(self):
+        counters, _ = metrics.snapshot()
+        return sum(value for (name, _), value in counters.items() if name == 'stock_transfer_retries_total')
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', "Requests served, by view, method and status"),
+    'http_request_duration_seconds': ('histogram', "Request latency"),
+    'http_response_size_bytes_total': ('counter', "Response body bytes"),
+    'db_queries_total': ('counter', "SQL queries executed"),
+    'db_query_duration_seconds_total': ('counter', "Time spent executing SQL"),
+    'serializer_duration_seconds_total': ('counter', "Time spent serializing response data"),
+    'cache_requests_total': ('counter', "Cache lookups, by cache and result"),
+    'query_budget_violations_total': ('counter', "Requests over their query budget or repeating a query"),
+    'stock_transfer_retries_total': ('counter', "Stock transfers retried after a serialization failure or deadlock"),
+    'idempotent_replays_total': ('counter', "Writes answered with the stored response of their Idempotency-Key"),
+    'throttled_requests_total': ('counter', "Requests refused by the throttle, by role and cost"),
+    'stock_group_commit_batches_total': ('counter', "Group commit batches applied"),
+    'stock_group_commit_updates_total': ('counter', "Stock updates applied by group commit"),
+    'stock_group_commit_seconds': ('histogram', "Time to apply and commit a group commit batch"),
+}
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+_last_flush = 0.0
+_token = None
+
+SNAPSHOT_NAME = re.compile(r'metrics-(\d+)(?:-\w+)?\.json$')
+RETIRED_SNAPSHOT = 'metrics-retired.json'
+
+
+def _shard():
+    """Per-thread series, so recording never takes a lock"""
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = {'counters': {}, 'histograms': {}}
+        # Only taken once per thread, never on the recording path
+        with _shards_lock:
+            _shards.append(shard)
+        _local.shard = shard
+    return shard
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def increment(name, labels, value=1):
+    counters = _shard()['counters']
+    key = _key(name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, labels, value):
+    histograms = _shard()['histograms']
+    key = _key(name, labels)
+    series = histograms.get(key)
+    if series is None:
+        # One slot per bucket plus +Inf, then sum and count
+        series = histograms[key] = [0] * (len(DURATION_BUCKETS) + 3)
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if value <= bound:
+            series[i] += 1
+            break
+    else:
+        series[len(DURATION_BUCKETS)] += 1
+    series[-2] += value
+    series[-1] += 1
+
+
+def snapshot():
+    """Merge all thread shards of this process"""
+    counters = {}
+    histograms = {}
+    for shard in list(_shards):
+        for key, value in shard['counters'].copy().items():
+            counters[key] = counters.get(key, 0) + value
+        for key, series in shard['histograms'].copy().items():
+            merged = histograms.setdefault(key, [0] * len(series))
+            for i, value in enumerate(series):
+                merged[i] += value
+    return counters, histograms
+
+
+def _snapshot_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'metrics-{pid}-{_process_token()}.json')
+
+
+def _process_token():
+    """
+    Distinguishes this process from earlier ones with the same pid, so a
+    recycled worker's pid never overwrites the totals of the one it replaced
+    """
+    global _token
+    if _token is None or _token[0] != os.getpid():
+        _token = (os.getpid(), uuid.uuid4().hex[:8])
+    return _token[1]
+
+
+def _dump(counters, histograms):
+    return {
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'histograms': [[name, labels, series] for (name, labels), series in histograms.items()],
+    }
+
+
+def _write(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(counters, histograms, data):
+    for name, labels, value in data['counters']:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, series in data['histograms']:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        merged = histograms.setdefault(key, [0] * len(series))
+        for i, value in enumerate(series):
+            merged[i] += value
+
+
+def flush(force=False):
+    """
+    Write this worker's totals to ``METRICS_DIR`` so whichever gunicorn
+    worker serves the scrape can aggregate them
+    """
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    _write(_snapshot_path(os.getpid()), _dump(*snapshot()))
+
+
+@contextmanager
+def _directory_lock(directory):
+    """Scrapes retiring snapshots must not read them half merged"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _retire_exited(directory, own):
+    """
+    Fold the snapshots of exited workers into one file, so recycled workers
+    do not pile up files that every scrape has to read. Totals are kept:
+    counters never go backwards.
+    """
+    by_pid = {}
+    for filename in os.listdir(directory):
+        match = SNAPSHOT_NAME.match(filename)
+        if match and filename != own:
+            by_pid.setdefault(int(match.group(1)), []).append(filename)
+
+    exited = []
+    for pid, filenames in by_pid.items():
+        if pid != os.getpid() and _pid_running(pid):
+            # Older files of a reused pid belong to exited processes
+            filenames.sort(key=lambda filename: os.path.getmtime(os.path.join(directory, filename)))
+            filenames = filenames[:-1]
+        exited += filenames
+    if not exited:
+        return
+
+    counters = {}
+    histograms = {}
+    retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+    for path in [retired_path] + [os.path.join(directory, filename) for filename in exited]:
+        data = _read(path)
+        if data is not None:
+            _merge(counters, histograms, data)
+    _write(retired_path, _dump(counters, histograms))
+    for filename in exited:
+        os.remove(os.path.join(directory, filename))
+
+
+def collect():
+    """Totals across all workers sharing ``METRICS_DIR``"""
+    counters, histograms = snapshot()
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return counters, histograms
+
+    own = os.path.basename(_snapshot_path(os.getpid()))
+    with _directory_lock(directory):
+        _retire_exited(directory, own)
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            data = _read(os.path.join(directory, filename))
+            if data is not None:
+                _merge(counters, histograms, data)
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '%s="%s"' % (k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for k, v in pairs
+    )
+    return '{%s}' % ','.join(escaped)
+
+
+def render_prometheus():
+    counters, histograms = collect()
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), series in histograms.items():
+        by_name.setdefault(name, []).append((labels, series))
+
+    histogram_names = {name for name, _ in histograms}
+
+    lines = []
+    for name in sorted(by_name):
+        metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+        # Series recorded by observe() are histograms whatever METRIC_HELP says
+        if name in histogram_names:
+            metric_type = 'histogram'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(by_name[name]):
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ('+Inf',), value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (e.g. permission denied) arrive as dicts
+        return json.dumps(data).encode(self.charset)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0002_outbox_webhooks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="supplier",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0003_category_supplier_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("product_id", models.BigIntegerField()),
+                ("sku", models.CharField(max_length=100)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["deleted_at", "product_id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["updated_at", "id"], name="inventory_p_updated_af11c4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="producttombstone",
+            index=models.Index(
+                fields=["deleted_at", "product_id"],
+                name="inventory_p_deleted_67c318_idx",
+            ),
+        ),
+    ]
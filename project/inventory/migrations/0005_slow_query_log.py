@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0004_product_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sql", models.TextField()),
+                ("params", models.TextField(blank=True)),
+                ("duration_ms", models.FloatField()),
+                ("view_name", models.CharField(blank=True, max_length=200)),
+                ("method", models.CharField(blank=True, max_length=10)),
+                ("path", models.CharField(blank=True, max_length=500)),
+                ("query_params", models.JSONField(blank=True, default=dict)),
+                ("plan", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "Slow queries",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_report_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReconciliationRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=10,
+                    ),
+                ),
+                ("incremental", models.BooleanField(default=False)),
+                ("repair", models.BooleanField(default=False)),
+                (
+                    "since",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Only products changed after this time were checked",
+                        null=True,
+                    ),
+                ),
+                ("products_checked", models.PositiveIntegerField(default=0)),
+                ("logs_checked", models.PositiveBigIntegerField(default=0)),
+                ("chain_breaks", models.PositiveIntegerField(default=0)),
+                ("invalid_entries", models.PositiveIntegerField(default=0)),
+                ("quantity_mismatches", models.PositiveIntegerField(default=0)),
+                ("repaired", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-started_at"],
+            },
+        ),
+    ]
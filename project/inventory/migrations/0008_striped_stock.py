@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:33
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0007_reconciliation_runs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductStockShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveSmallIntegerField()),
+                (
+                    "quantity",
+                    models.IntegerField(
+                        default=0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["product", "index"],
+            },
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stock_shards",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Counter rows the quantity is split across for hot SKUs (0 = single row)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="stocklog",
+            name="is_folded",
+            field=models.BooleanField(
+                default=True,
+                help_text="False until a striped product's change is folded into its quantity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocklog",
+            index=models.Index(
+                condition=models.Q(("is_folded", False)),
+                fields=["product"],
+                name="stocklog_unfolded_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productstockshard",
+            name="product",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="shards",
+                to="inventory.product",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="productstockshard",
+            constraint=models.UniqueConstraint(
+                fields=("product", "index"), name="unique_product_shard"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0008_striped_stock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Incremented on every change; edits only apply to the version they read",
+            ),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:39
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0009_product_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Location",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.CharField(max_length=20, unique=True)),
+                ("name", models.CharField(max_length=100)),
+                ("address", models.TextField(blank=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["code"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductLocationStock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.IntegerField(
+                        default=0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "min_stock_level",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Reorder point at this location",
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["location", "product"],
+            },
+        ),
+        migrations.AddField(
+            model_name="reconciliationrun",
+            name="overallocated",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="productlocationstock",
+            name="location",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="product_stock",
+                to="inventory.location",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productlocationstock",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="location_stock",
+                to="inventory.product",
+            ),
+        ),
+        migrations.AddField(
+            model_name="stocklog",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="Location the stock moved at (empty for unassigned stock)",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="stock_logs",
+                to="inventory.location",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocklog",
+            index=models.Index(
+                fields=["location", "-timestamp"], name="inventory_s_locatio_f4f2f5_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productlocationstock",
+            index=models.Index(
+                fields=["location", "product", "quantity"], name="location_stock_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productlocationstock",
+            index=models.Index(
+                condition=models.Q(("quantity__lte", models.F("min_stock_level"))),
+                fields=["location", "quantity"],
+                name="location_low_stock_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="productlocationstock",
+            constraint=models.UniqueConstraint(
+                fields=("product", "location"), name="unique_product_location"
+            ),
+        ),
+    ]
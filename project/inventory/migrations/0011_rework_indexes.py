@@ -0,0 +1,124 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0010_locations"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="inventory_p_sku_f85905_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="inventory_p_categor_607069_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="inventory_p_supplie_81b183_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="stocklog",
+            name="inventory_s_action_921c32_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="stocklog",
+            name="inventory_s_user_id_f37932_idx",
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="inventory.category",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="supplier",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="inventory.supplier",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="stocklog",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="stock_logs",
+                to="inventory.product",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["-created_at"], name="product_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "-created_at"], name="product_active_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "is_active"], name="product_category_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["supplier", "is_active"], name="product_supplier_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name"], name="product_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["price"], name="product_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_active", True), ("quantity__lte", models.F("min_stock_level"))
+                ),
+                fields=["quantity"],
+                name="product_low_stock_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocklog",
+            index=models.Index(fields=["-timestamp"], name="stocklog_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stocklog",
+            index=models.Index(
+                fields=["action", "-timestamp"], name="stocklog_action_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stocklog",
+            index=models.Index(
+                fields=["quantity_change"], name="stocklog_quantity_change_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0011_rework_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductValuation",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="valuation",
+                        serialize=False,
+                        to="inventory.product",
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.IntegerField(
+                        default=0, help_text="Units the cost layers account for"
+                    ),
+                ),
+                (
+                    "average_cost",
+                    models.DecimalField(
+                        decimal_places=4,
+                        default=0,
+                        help_text="Weighted average cost per unit",
+                        max_digits=12,
+                    ),
+                ),
+                (
+                    "fifo_value",
+                    models.DecimalField(
+                        decimal_places=4,
+                        default=0,
+                        help_text="Cost of the units remaining in the cost layers",
+                        max_digits=16,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CostLayer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("received_at", models.DateTimeField()),
+                ("unit_cost", models.DecimalField(decimal_places=4, max_digits=12)),
+                ("quantity", models.PositiveIntegerField()),
+                ("remaining", models.PositiveIntegerField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_layers",
+                        to="inventory.product",
+                    ),
+                ),
+                (
+                    "stock_log",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Movement the units arrived with (empty for opening stock)",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="cost_layers",
+                        to="inventory.stocklog",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["product", "received_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["product", "received_at", "id"],
+                        name="inventory_c_product_c6c8e2_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("remaining__gt", 0)),
+                        fields=["product", "received_at", "id"],
+                        name="costlayer_open_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0012_valuation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="abc_class",
+            field=models.CharField(
+                blank=True,
+                choices=[("A", "A"), ("B", "B"), ("C", "C")],
+                default="",
+                help_text="ABC class, stored by `manage.py refresh_abc_classes`",
+                max_length=1,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["abc_class", "-created_at"], name="product_abc_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0014_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("low_stock", "Low Stock"),
+                            ("restocked", "Restocked"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.IntegerField(help_text="Quantity after the crossing"),
+                ),
+                (
+                    "min_stock_level",
+                    models.IntegerField(
+                        help_text="Minimum stock level at the crossing"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_alerts",
+                        to="inventory.product",
+                    ),
+                ),
+                (
+                    "stock_log",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Stock movement that crossed the level; empty for product edits",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="stock_alerts",
+                        to="inventory.stocklog",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["product", "-id"], name="inventory_s_product_f02e7b_idx"
+                    ),
+                    models.Index(
+                        fields=["kind", "-id"], name="inventory_s_kind_01c7df_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
@@ -42,6 +44,7 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -61,6 +64,7 @@ class Supplier(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     address = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
@@ -73,6 +77,12 @@ class Product(models.Model):
     """
     Product model with comprehensive inventory tracking
     """
+    ABC_CLASS_CHOICES = [
+        ('A', 'A'),
+        ('B', 'B'),
+        ('C', 'C'),
+    ]
+
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     sku = models.CharField(max_length=100, unique=True, help_text="Stock Keeping Unit")
@@ -87,19 +97,22 @@ class Product(models.Model):
         validators=[MinValueValidator(Decimal('0.01'))],
         help_text="Price per unit"
     )
+    # Both lookups are served by the (fk, is_active) indexes below
     category = models.ForeignKey(
         Category, 
         on_delete=models.SET_NULL, 
         null=True, 
         blank=True,
-        related_name='products'
+        related_name='products',
+        db_index=False
     )
     supplier = models.ForeignKey(
         Supplier, 
         on_delete=models.SET_NULL, 
         null=True, 
         blank=True,
-        related_name='products'
+        related_name='products',
+        db_index=False
     )
     created_by = models.ForeignKey(
         User, 
@@ -123,14 +136,47 @@ class Product(models.Model):
         help_text="Minimum stock level before low stock alert"
     )
     is_active = models.BooleanField(default=True)
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Counter rows the quantity is split across for hot SKUs (0 = single row)"
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text="Incremented on every change; edits only apply to the version they read"
+    )
+    abc_class = models.CharField(
+        max_length=1,
+        choices=ABC_CLASS_CHOICES,
+        blank=True,
+        default='',
+        help_text="ABC class, stored by `manage.py refresh_abc_classes`"
+    )
 
     class Meta:
         ordering = ['-created_at']
+        # sku needs no index of its own: it is unique. Check the plans with
+        # `manage.py check_query_plans` when changing these.
         indexes = [
-            models.Index(fields=['sku']),
-            models.Index(fields=['category']),
-            models.Index(fields=['supplier']),
+            # Default list order, with and without the active filter
+            models.Index(fields=['-created_at'], name='product_created_idx'),
+            models.Index(fields=['is_active', '-created_at'], name='product_active_created_idx'),
+            # Active product counts per category and supplier
+            models.Index(fields=['category', 'is_active'], name='product_category_active_idx'),
+            # Listings filtered by ABC class, in the default order
+            models.Index(fields=['abc_class', '-created_at'], name='product_abc_created_idx'),
+            models.Index(fields=['supplier', 'is_active'], name='product_supplier_active_idx'),
+            # Client-selectable orderings (?ordering=)
+            models.Index(fields=['name'], name='product_name_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
             models.Index(fields=['quantity']),
+            # Low stock report: only the few active rows at or below their level
+            models.Index(
+                fields=['quantity'],
+                condition=models.Q(is_active=True, quantity__lte=models.F('min_stock_level')),
+                name='product_low_stock_idx'
+            ),
+            # Delta sync walks products in (updated_at, id) order
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -151,6 +197,123 @@ class Product(models.Model):
         self.sku = self.sku.upper()
         super().save(*args, **kwargs)
 
+    @property
+    def is_striped(self):
+        return self.stock_shards > 0
+
+
+class ProductStockShard(models.Model):
+    """
+    One slice of a striped product's quantity; concurrent stock updates land
+    on different rows and ``fold_stock_shards`` rolls them into the product
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='shards'
+    )
+    index = models.PositiveSmallIntegerField()
+    quantity = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+
+    class Meta:
+        ordering = ['product', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'index'], name='unique_product_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} shard {self.index}: {self.quantity}"
+
+
+class Location(models.Model):
+    """
+    Warehouse or store holding stock
+    """
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    address = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['code']
+
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
+    def save(self, *args, **kwargs):
+        self.code = self.code.upper()
+        super().save(*args, **kwargs)
+
+
+class ProductLocationStock(models.Model):
+    """
+    Stock of one product at one location. ``Product.quantity`` is the rollup:
+    the sum of these rows plus any stock not assigned to a location.
+    """
+    # Both lookups are served by the composite indexes below
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='location_stock',
+        db_index=False
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.PROTECT,
+        related_name='product_stock',
+        db_index=False
+    )
+    quantity = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    min_stock_level = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        help_text="Reorder point at this location"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['location', 'product']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'location'], name='unique_product_location'),
+        ]
+        indexes = [
+            # Per-location listings and valuation read (product, quantity) from the index
+            models.Index(fields=['location', 'product', 'quantity'], name='location_stock_idx'),
+            # Per-location low stock only scans rows at or below their reorder point
+            models.Index(
+                fields=['location', 'quantity'],
+                condition=models.Q(quantity__lte=models.F('min_stock_level')),
+                name='location_low_stock_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.location_id}: {self.quantity}"
+
+    @property
+    def is_low_stock(self):
+        return self.quantity <= self.min_stock_level
+
+
+class ProductTombstone(models.Model):
+    """
+    Marker left behind by a deleted product so sync clients can drop it
+    """
+    product_id = models.BigIntegerField()
+    sku = models.CharField(max_length=100)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'product_id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'product_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.sku} deleted at {self.deleted_at}"
+
 
 class StockLog(models.Model):
     """
@@ -165,10 +328,12 @@ class StockLog(models.Model):
         ('transfer', 'Transfer'),
     ]
 
+    # Served by the (product, -timestamp) index
     product = models.ForeignKey(
         Product, 
         on_delete=models.CASCADE,
-        related_name='stock_logs'
+        related_name='stock_logs',
+        db_index=False
     )
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     quantity_change = models.IntegerField(
@@ -194,13 +359,36 @@ class StockLog(models.Model):
         blank=True,
         help_text="Cost per unit for this transaction"
     )
+    is_folded = models.BooleanField(
+        default=True,
+        help_text="False until a striped product's change is folded into its quantity"
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='stock_logs',
+        db_index=False,
+        help_text="Location the stock moved at (empty for unassigned stock)"
+    )
 
     class Meta:
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['product', '-timestamp']),
-            models.Index(fields=['action']),
-            models.Index(fields=['user']),
+            # Unfiltered listings and date ranges, and listings by action
+            models.Index(fields=['-timestamp'], name='stocklog_timestamp_idx'),
+            models.Index(fields=['action', '-timestamp'], name='stocklog_action_idx'),
+            # ?ordering=quantity_change and the increase/decrease filter
+            models.Index(fields=['quantity_change'], name='stocklog_quantity_change_idx'),
+            models.Index(fields=['location', '-timestamp']),
+            # The folder only looks for pending changes
+            models.Index(
+                fields=['product'],
+                condition=models.Q(is_folded=False),
+                name='stocklog_unfolded_idx'
+            ),
         ]
 
     def __str__(self):
@@ -211,4 +399,305 @@ class StockLog(models.Model):
         """Calculate total value of this stock movement"""
         if self.unit_cost:
             return abs(self.quantity_change) * self.unit_cost
-        return abs(self.quantity_change) * self.product.price
\ No newline at end of file
+        return abs(self.quantity_change) * self.product.price
+
+
+class CostLayer(models.Model):
+    """
+    Units received at one cost. FIFO valuation issues stock from the oldest
+    layers with units remaining.
+    """
+    # Served by the (product, received_at) indexes below
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='cost_layers',
+        db_index=False
+    )
+    stock_log = models.ForeignKey(
+        StockLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cost_layers',
+        help_text="Movement the units arrived with (empty for opening stock)"
+    )
+    received_at = models.DateTimeField()
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4)
+    quantity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['product', 'received_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'received_at', 'id']),
+            # Stock movements only load the layers they can issue from
+            models.Index(
+                fields=['product', 'received_at', 'id'],
+                condition=models.Q(remaining__gt=0),
+                name='costlayer_open_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.remaining}/{self.quantity} @ {self.unit_cost}"
+
+
+class ProductValuation(models.Model):
+    """
+    Cost of a product's stock, kept up to date by every stock movement
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='valuation'
+    )
+    quantity = models.IntegerField(default=0, help_text="Units the cost layers account for")
+    average_cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=0,
+        help_text="Weighted average cost per unit"
+    )
+    fifo_value = models.DecimalField(
+        max_digits=16,
+        decimal_places=4,
+        default=0,
+        help_text="Cost of the units remaining in the cost layers"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} @ {self.average_cost}"
+
+    @property
+    def average_value(self):
+        return self.quantity * self.average_cost
+
+
+class StockAlert(models.Model):
+    """
+    A product crossing its minimum stock level, recorded by the write that
+    moved it across
+    """
+    KIND_CHOICES = [
+        ('low_stock', 'Low Stock'),
+        ('restocked', 'Restocked'),
+    ]
+
+    # Served by the (product, -id) index below
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_alerts',
+        db_index=False
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text="Quantity after the crossing")
+    min_stock_level = models.IntegerField(help_text="Minimum stock level at the crossing")
+    stock_log = models.ForeignKey(
+        StockLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_alerts',
+        help_text="Stock movement that crossed the level; empty for product edits"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # A product's last alert, and its alerts newest first
+            models.Index(fields=['product', '-id']),
+            models.Index(fields=['kind', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind} at {self.quantity}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Stock events written in the same transaction as the change they describe,
+    drained asynchronously by the webhook dispatcher
+    """
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk}"
+
+
+class WebhookEndpoint(models.Model):
+    """
+    External receiver of stock events with its delivery cursor
+    """
+    name = models.CharField(max_length=100, unique=True)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Shared secret used to sign payloads (HMAC-SHA256)"
+    )
+    is_active = models.BooleanField(default=True)
+    last_event_id = models.BigIntegerField(
+        default=0,
+        help_text="Id of the last outbox event delivered to this endpoint"
+    )
+    failure_count = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class SlowQuery(models.Model):
+    """
+    SQL statement that exceeded SLOW_QUERY_THRESHOLD_MS, with its plan when sampled
+    """
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    view_name = models.CharField(max_length=200, blank=True)
+    method = models.CharField(max_length=10, blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    query_params = models.JSONField(default=dict, blank=True)
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Slow queries"
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms {self.view_name or self.sql[:50]}"
+
+
+class ReportJob(models.Model):
+    """
+    Report or export requested through the API and built by the
+    ``run_report_jobs`` worker outside the request path
+    """
+    KIND_CHOICES = [
+        ('inventory_report', 'Inventory Report'),
+        ('products_export', 'Products Export (CSV)'),
+        ('stock_logs_export', 'Stock Logs Export (CSV)'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result_file = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Result file name under REPORT_JOB_DIR"
+    )
+    row_count = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_by', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.pk} ({self.status})"
+
+
+class ReconciliationRun(models.Model):
+    """
+    One ``reconcile_stock`` pass; incremental runs start from the last
+    completed run
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    incremental = models.BooleanField(default=False)
+    repair = models.BooleanField(default=False)
+    since = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Only products changed after this time were checked"
+    )
+    products_checked = models.PositiveIntegerField(default=0)
+    logs_checked = models.PositiveBigIntegerField(default=0)
+    chain_breaks = models.PositiveIntegerField(default=0)
+    invalid_entries = models.PositiveIntegerField(default=0)
+    quantity_mismatches = models.PositiveIntegerField(default=0)
+    overallocated = models.PositiveIntegerField(default=0)
+    repaired = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Reconciliation {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response to a write sent with an ``Idempotency-Key`` header, replayed to
+    retries of the same request until it expires
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text="Hash of the method, path and body the key was first used with"
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
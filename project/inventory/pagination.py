@@ -0,0 +1,129 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def planner_estimate(queryset):
+    """Row count the PostgreSQL planner expects ``queryset`` to return"""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """Exact count, reused for ``ESTIMATED_COUNT_CACHE_SECONDS`` per distinct query"""
+    key = 'estimated-count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, settings.ESTIMATED_COUNT_CACHE_SECONDS)
+
+
+def estimated_count(queryset):
+    """
+    Return ``(count, is_estimate)``.
+
+    Up to ``ESTIMATED_COUNT_THRESHOLD`` rows are counted exactly, with a
+    LIMIT so larger results stop there. Larger results are estimated by
+    the planner on PostgreSQL and counted once per cache TTL elsewhere.
+    """
+    queryset = queryset.order_by()
+    threshold = settings.ESTIMATED_COUNT_THRESHOLD
+    count = queryset.values('pk')[:threshold + 1].count()
+    if count <= threshold:
+        return count, False
+
+    if connections[queryset.db].vendor == 'postgresql':
+        # Stale statistics must not report fewer rows than were just seen
+        return max(planner_estimate(queryset), count), True
+    return cached_count(queryset), True
+
+
+class EstimatedCountPage(Page):
+    # Set when the page was fetched with one row beyond it
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is None:
+            return super().has_next()
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Pages past an estimated count are fetched rather than rejected: an
+    estimate can be short of the real count. Whether another page follows
+    is then decided by fetching one row beyond the page.
+    """
+
+    @cached_property
+    def count(self):
+        count, self.count_is_estimate = estimated_count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        if not (self.count and self.count_is_estimate):
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if number > 1 and not rows:
+            raise EmptyPage(_("That page contains no results"))
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedCountPage(*args, **kwargs)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination without an exact ``COUNT(*)`` over large results.
+
+    ``count_is_estimate`` in the response is true when ``count`` (and so the
+    last page number) is approximate.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimate': self.page.paginator.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_estimate'] = {'type': 'boolean', 'example': False}
+        return response_schema
+
+
+class StockAlertPagination(CursorPagination):
+    """
+    Keyset pages over alert ids: no count, and pages do not shift while new
+    alerts arrive. The view's ``?ordering=`` picks the direction.
+    """
+    ordering = '-id'
@@ -74,4 +74,37 @@ class StockLogPermission(permissions.BasePermission):
             return False
 
         # Only read access allowed
-        return request.method in permissions.SAFE_METHODS
\ No newline at end of file
+        return request.method in permissions.SAFE_METHODS
+
+
+class IsAdminRole(permissions.BasePermission):
+    """
+    Operational endpoints (metrics, profiling) are restricted to admins
+    """
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        return request.user.is_admin
+
+
+class ProductBatchPermission(permissions.BasePermission):
+    """
+    The batch endpoint is a POST only to carry the keys; every role may read
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+
+class ReportJobPermission(permissions.BasePermission):
+    """
+    Any role may request reports; jobs are visible to their owner and admins
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_admin or obj.created_by_id == request.user.id
@@ -0,0 +1,165 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .instrumentation import current_stats
+from .permissions import IsAdminRole
+
+PROFILE_MODES = ('cprofile', 'sql')
+
+
+def requested_mode(request):
+    return request.GET.get('_profile') or request.META.get('HTTP_X_PROFILE')
+
+
+def can_profile(request):
+    """
+    Authenticate the request the way the API views do and apply the same
+    admin-only permission as the metrics endpoint
+    """
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        return IsAdminRole().has_permission(drf_request, None)
+    except APIException:
+        return False
+
+
+def report_path(profile_id):
+    return os.path.join(settings.PROFILE_DIR, f'{profile_id}.json')
+
+
+def save_report(report):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(report_path(report['id']), 'w') as f:
+        json.dump(report, f, cls=DjangoJSONEncoder)
+
+    # Keep only the most recent reports
+    reports = sorted(
+        (entry for entry in os.scandir(settings.PROFILE_DIR) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in reports[:-settings.PROFILE_MAX_REPORTS]:
+        os.remove(entry.path)
+
+
+def load_report(profile_id):
+    try:
+        with open(report_path(profile_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def format_stats(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILE_TOP_FUNCTIONS)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request on demand.
+
+    Admins add ``?_profile=cprofile`` (or ``sql`` for the SQL timeline only)
+    or send an ``X-Profile`` header. The report is stored under
+    ``PROFILE_DIR`` and linked from the ``X-Profile-Url`` response header.
+    Requests without the flag only pay for the flag lookup.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        mode = requested_mode(request)
+        if not mode or mode not in PROFILE_MODES or not can_profile(request):
+            return self.get_response(request)
+
+        profiler, started = self.start(mode)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(profiler)
+        return self.finish(request, response, mode, profiler, started)
+
+    async def __acall__(self, request):
+        mode = requested_mode(request)
+        if not mode or mode not in PROFILE_MODES or not await sync_to_async(can_profile)(request):
+            return await self.get_response(request)
+
+        # Under ASGI cProfile only sees the event loop thread; the SQL
+        # timeline still covers queries run in executor threads
+        profiler, started = self.start(mode)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(profiler)
+        return self.finish(request, response, mode, profiler, started)
+
+    def start(self, mode):
+        stats = current_stats()
+        if stats is not None:
+            stats.query_log = []
+
+        profiler = cProfile.Profile() if mode == 'cprofile' else None
+        if profiler:
+            profiler.enable()
+        return profiler, time.perf_counter()
+
+    def stop(self, profiler):
+        if profiler:
+            profiler.disable()
+
+    def finish(self, request, response, mode, profiler, started):
+        duration = time.perf_counter() - started
+        stats = current_stats()
+        queries = stats.query_log if stats is not None else []
+        report = {
+            'id': str(uuid.uuid4()),
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'query_count': len(queries),
+            'query_time_ms': round(sum(query[1] for query in queries) * 1000, 3),
+            'queries': [
+                {
+                    'start_ms': round(offset * 1000, 3),
+                    'duration_ms': round(elapsed * 1000, 3),
+                    'sql': sql,
+                    'params': repr(params),
+                }
+                for offset, elapsed, sql, params in queries
+            ],
+            'profile': format_stats(profiler) if profiler else None,
+        }
+        save_report(report)
+
+        response['X-Profile-Id'] = report['id']
+        response['X-Profile-Url'] = f"/api/profiles/{report['id']}/"
+        response['Server-Timing'] = (
+            f"total;dur={report['duration_ms']}, db;dur={report['query_time_ms']}"
+        )
+        return response
@@ -0,0 +1,134 @@
+import django
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery, Window
+from django.db.models.functions import Lag
+
+from .alerts import record_stock_log_alerts
+from .locations import allocated_quantity
+from .models import Product, StockLog
+from .valuation import value_stock_logs
+from .webhooks import enqueue_stock_event
+
+# Ledger order: timestamps can tie, ids break the tie in insertion order
+LEDGER_ORDER = [F('timestamp').asc(), F('id').asc()]
+
+
+def init_worker():
+    """Process pool initializer, needed when workers are spawned rather than forked"""
+    django.setup()
+
+
+def product_scope(lo, hi, since=None):
+    products = Product.objects.filter(id__gte=lo, id__lt=hi)
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+    return products
+
+
+def id_ranges(since=None, size=2000):
+    """Split the product id space into ``[lo, hi)`` ranges of ``size`` ids"""
+    products = Product.objects.all()
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+    bounds = products.aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return []
+    return [
+        (lo, min(lo + size, bounds['hi'] + 1))
+        for lo in range(bounds['lo'], bounds['hi'] + 1, size)
+    ]
+
+
+def check_range(lo, hi, since=None):
+    """
+    Verify the stock ledger of the products with ids in ``[lo, hi)``.
+
+    Four checks, each one query over the range:
+
+    - every log's ``new_quantity`` is ``previous_quantity + quantity_change``
+    - every log's ``previous_quantity`` is the ``new_quantity`` of the
+      product's preceding log (no gaps in the chain)
+    - the last log's ``new_quantity`` equals ``Product.quantity``
+    - ``Product.quantity`` covers the stock assigned to locations
+    """
+    products = product_scope(lo, hi, since)
+    # Striped products' pending changes join the ledger when they are folded
+    logs = StockLog.objects.filter(product__in=products.values('id'), is_folded=True).order_by()
+
+    logs_checked = logs.aggregate(count=Count('id'))['count']
+
+    invalid_entries = list(
+        logs.exclude(new_quantity=F('previous_quantity') + F('quantity_change'))
+        .values_list('id', 'product_id', 'previous_quantity', 'quantity_change', 'new_quantity')
+    )
+
+    chain_breaks = list(
+        logs.annotate(
+            expected_previous=Window(
+                Lag('new_quantity'), partition_by=[F('product_id')], order_by=LEDGER_ORDER
+            )
+        )
+        .filter(expected_previous__isnull=False)
+        .exclude(previous_quantity=F('expected_previous'))
+        .values_list('id', 'product_id', 'expected_previous', 'previous_quantity')
+    )
+
+    last_logged = (
+        StockLog.objects.filter(product=OuterRef('pk'), is_folded=True)
+        .order_by('-timestamp', '-id').values('new_quantity')[:1]
+    )
+    ledger = products.annotate(ledger_quantity=Subquery(last_logged))
+    products_checked = products.count()
+    mismatches = list(
+        ledger.filter(ledger_quantity__isnull=False)
+        .exclude(quantity=F('ledger_quantity'))
+        .values_list('id', 'sku', 'quantity', 'ledger_quantity')
+    )
+
+    overallocated = list(
+        products.annotate(allocated=allocated_quantity())
+        .filter(quantity__lt=F('allocated'))
+        .values_list('id', 'sku', 'quantity', 'allocated')
+    )
+
+    return {
+        'range': (lo, hi),
+        'products_checked': products_checked,
+        'logs_checked': logs_checked,
+        'invalid_entries': invalid_entries,
+        'chain_breaks': chain_breaks,
+        'mismatches': mismatches,
+        'overallocated': overallocated,
+    }
+
+
+def repair_mismatch(product_id, reference_number):
+    """
+    Append an adjustment log that brings the ledger to ``Product.quantity``.
+
+    The product row is locked and the mismatch re-checked first, since stock
+    may have moved since the range was checked. Returns the new log or None.
+    Gaps inside the chain are left alone: logs are an audit trail.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        last_log = (
+            StockLog.objects.filter(product=product, is_folded=True)
+            .order_by('-timestamp', '-id').first()
+        )
+        if last_log is None or last_log.new_quantity == product.quantity:
+            return None
+
+        stock_log = StockLog.objects.create(
+            product=product,
+            action='adjustment',
+            quantity_change=product.quantity - last_log.new_quantity,
+            previous_quantity=last_log.new_quantity,
+            new_quantity=product.quantity,
+            reason="Ledger reconciliation: stock log did not match product quantity",
+            reference_number=reference_number,
+        )
+        value_stock_logs(product, [stock_log])
+        record_stock_log_alerts([stock_log])
+        enqueue_stock_event(stock_log)
+        return stock_log
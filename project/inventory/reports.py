@@ -0,0 +1,138 @@
+import csv
+from datetime import timedelta
+
+from django.db.models import Sum, F
+from django.utils import timezone
+
+from .models import Product, Category, Supplier, StockLog
+from .filters import ProductFilter, StockLogFilter
+from .serializers import InventoryReportSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+
+PRODUCT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('sku', 'sku'),
+    ('name', 'name'),
+    ('category', 'category__name'),
+    ('supplier', 'supplier__name'),
+    ('price', 'price'),
+    ('quantity', 'quantity'),
+    ('min_stock_level', 'min_stock_level'),
+    ('is_active', 'is_active'),
+    ('updated_at', 'updated_at'),
+]
+
+STOCK_LOG_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('timestamp', 'timestamp'),
+    ('product_sku', 'product__sku'),
+    ('product_name', 'product__name'),
+    ('action', 'action'),
+    ('quantity_change', 'quantity_change'),
+    ('previous_quantity', 'previous_quantity'),
+    ('new_quantity', 'new_quantity'),
+    ('unit_cost', 'unit_cost'),
+    ('reference_number', 'reference_number'),
+    ('reason', 'reason'),
+    ('location', 'location__code'),
+    ('user', 'user__username'),
+]
+
+
+class ReportParamsError(ValueError):
+    """Job parameters rejected by the report's filter set"""
+
+    def __init__(self, errors):
+        super().__init__(str(errors))
+        self.errors = errors
+
+
+def build_inventory_report(category=None, supplier=None):
+    """
+    Inventory summary shared by the report endpoint and report jobs
+    """
+    products_queryset = Product.objects.all()
+    if category:
+        products_queryset = products_queryset.filter(category__name__icontains=category)
+    if supplier:
+        products_queryset = products_queryset.filter(supplier__name__icontains=supplier)
+
+    # Calculate metrics
+    total_products = products_queryset.count()
+    active_products = products_queryset.filter(is_active=True).count()
+    inactive_products = total_products - active_products
+
+    # Stock analysis
+    active_products_qs = products_queryset.filter(is_active=True)
+    low_stock_products = active_products_qs.filter(quantity__lte=F('min_stock_level')).count()
+    out_of_stock_products = active_products_qs.filter(quantity=0).count()
+
+    # Financial metrics
+    stock_value_data = active_products_qs.aggregate(
+        total_value=Sum(F('quantity') * F('price'), default=0),
+        total_quantity=Sum('quantity', default=0)
+    )
+
+    # Category and supplier counts
+    categories_count = Category.objects.count()
+    suppliers_count = Supplier.objects.count()
+
+    # Recent stock changes (last 7 days)
+    week_ago = timezone.now() - timedelta(days=7)
+    recent_changes = StockLog.objects.filter(timestamp__gte=week_ago).count()
+
+    serializer = InventoryReportSerializer(data={
+        'total_products': total_products,
+        'active_products': active_products,
+        'inactive_products': inactive_products,
+        'low_stock_products': low_stock_products,
+        'out_of_stock_products': out_of_stock_products,
+        'total_stock_value': stock_value_data['total_value'] or 0,
+        'total_quantity': stock_value_data['total_quantity'] or 0,
+        'categories_count': categories_count,
+        'suppliers_count': suppliers_count,
+        'recent_stock_changes': recent_changes,
+    })
+    serializer.is_valid()
+
+    return {
+        'report': serializer.data,
+        'generated_at': timezone.now(),
+        'filters': {
+            'category': category,
+            'supplier': supplier
+        }
+    }
+
+
+def filtered(filterset_class, queryset, params):
+    filterset = filterset_class(data=params, queryset=queryset)
+    if not filterset.is_valid():
+        raise ReportParamsError(filterset.errors)
+    return filterset.qs
+
+
+def write_csv(file, queryset, columns):
+    """
+    Stream rows to ``file`` with a server-side cursor, so memory stays flat
+    however many rows the export has. Returns the row count.
+    """
+    writer = csv.writer(file)
+    writer.writerow([header for header, _ in columns])
+    rows = queryset.values_list(*[field for _, field in columns])
+    count = 0
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def export_products(file, params):
+    queryset = filtered(ProductFilter, Product.objects.all(), params).order_by('id')
+    return write_csv(file, queryset, PRODUCT_EXPORT_COLUMNS)
+
+
+def export_stock_logs(file, params):
+    queryset = filtered(StockLogFilter, StockLog.objects.all(), params).order_by('id')
+    return write_csv(file, queryset, STOCK_LOG_EXPORT_COLUMNS)
@@ -1,12 +1,26 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from .models import Product, Category, Supplier, StockLog
+from django.db.models import F
+from django.utils import timezone
+from .models import (
+    Product, Category, Supplier, StockLog, ReportJob, Location, ProductLocationStock, StockAlert
+)
+from .filters import ProductFilter, StockLogFilter
+from .webhooks import enqueue_stock_event
+from .alerts import detect_crossing, record_alerts, record_stock_log_alerts
+from .striping import update_striped_stock
+from .valuation import value_quantity_change, value_stock_logs
+from .group_commit import submit_stock_update
+from .locations import allocated_by_product, allocated_quantity, apply_location_change
+from .exceptions import VersionConflict
+from .instrumentation import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     
     class Meta:
@@ -36,7 +50,7 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     products_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -45,10 +59,14 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at',)
 
     def get_products_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        # Annotated by the views; freshly created rows fall back to a query
+        count = getattr(obj, 'active_products_count', None)
+        if count is None:
+            count = obj.products.filter(is_active=True).count()
+        return count
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     products_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -60,29 +78,54 @@ class SupplierSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at',)
 
     def get_products_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        # Annotated by the views; freshly created rows fall back to a query
+        count = getattr(obj, 'active_products_count', None)
+        if count is None:
+            count = obj.products.filter(is_active=True).count()
+        return count
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class FieldSelectionMixin:
+    """
+    Return only the requested fields: ``fields=id,sku,quantity`` in the query
+    string of a GET, or the ``fields`` argument. Unknown names are ignored.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            request = self.context.get('request')
+            if request is None or request.method != 'GET' or not request.query_params.get('fields'):
+                return
+            fields = request.query_params['fields'].split(',')
+
+        selected = {name.strip() for name in fields}
+        for name in set(self.fields) - selected:
+            self.fields.pop(name)
+
+
+class ProductSerializer(FieldSelectionMixin, TimedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     last_modified_by_username = serializers.CharField(source='last_modified_by.username', read_only=True)
     stock_value = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
+    # On writes: the version the client edited, rejected with 409 if it is stale
+    version = serializers.IntegerField(required=False, min_value=1)
 
     class Meta:
         model = Product
         fields = (
             'id', 'name', 'description', 'sku', 'quantity', 'price',
             'category', 'category_name', 'supplier', 'supplier_name',
-            'min_stock_level', 'is_active', 'stock_value', 'is_low_stock',
+            'min_stock_level', 'is_active', 'stock_shards', 'stock_value', 'is_low_stock', 'abc_class',
             'created_by', 'created_by_username', 'last_modified_by', 
-            'last_modified_by_username', 'created_at', 'updated_at'
+            'last_modified_by_username', 'created_at', 'updated_at', 'version'
         )
         read_only_fields = (
             'created_by', 'last_modified_by', 'created_at', 'updated_at',
-            'stock_value', 'is_low_stock'
+            'stock_shards', 'stock_value', 'is_low_stock', 'abc_class'
         )
 
     def validate_sku(self, value):
@@ -95,6 +138,16 @@ class ProductSerializer(serializers.ModelSerializer):
     def validate_quantity(self, value):
         if value < 0:
             raise serializers.ValidationError("Quantity cannot be negative")
+        if self.instance is not None and self.instance.is_striped and value != self.instance.quantity:
+            raise serializers.ValidationError(
+                "Quantity of a striped product can only change through stock updates"
+            )
+        if self.instance is not None and value < self.instance.quantity:
+            allocated = allocated_by_product([self.instance.pk]).get(self.instance.pk, 0)
+            if value < allocated:
+                raise serializers.ValidationError(
+                    f"Quantity cannot be lower than the {allocated} units assigned to locations"
+                )
         return value
 
     def validate_price(self, value):
@@ -102,13 +155,86 @@ class ProductSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Price must be greater than 0")
         return value
 
+    def create(self, validated_data):
+        validated_data.pop('version', None)
+        with transaction.atomic():
+            product = super().create(validated_data)
+            # Initial stock is valued at the product's price
+            value_quantity_change(product, 0, product.quantity)
+            record_alerts([detect_crossing(product, None, product.quantity)])
+        return product
 
-class StockLogSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        """
+        Write only the submitted fields, and only if the row is still at the
+        version the client read; no lock is held between read and write
+        """
+        expected_version = validated_data.pop('version', instance.version)
+        updated_at = timezone.now()
+        with transaction.atomic():
+            updated = Product.objects.filter(pk=instance.pk, version=expected_version).update(
+                **validated_data,
+                version=F('version') + 1,
+                updated_at=updated_at
+            )
+            if not updated:
+                current_version = Product.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+                raise VersionConflict(current_version)
+
+            # The version matched, so the quantity was still the one read
+            quantity_before = instance.quantity
+            min_before = instance.min_stock_level
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.version = expected_version + 1
+            instance.updated_at = updated_at
+            value_quantity_change(instance, quantity_before, instance.quantity)
+            record_alerts([detect_crossing(instance, quantity_before, instance.quantity, min_before)])
+        return instance
+
+
+class LocationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ('id', 'code', 'name', 'address', 'is_active', 'created_at', 'updated_at')
+        read_only_fields = ('created_at', 'updated_at')
+
+    def validate_code(self, value):
+        value = value.upper().strip()
+        if not value:
+            raise serializers.ValidationError("Code cannot be empty")
+        # The unique validator ran on the code as submitted, before uppercasing
+        existing = Location.objects.filter(code=value)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
+            raise serializers.ValidationError("location with this code already exists.")
+        return value
+
+
+class ProductLocationStockSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_sku = serializers.CharField(source='product.sku', read_only=True)
+    location_code = serializers.CharField(source='location.code', read_only=True)
+    is_low_stock = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = ProductLocationStock
+        fields = (
+            'id', 'product', 'product_name', 'product_sku', 'location', 'location_code',
+            'quantity', 'min_stock_level', 'is_low_stock', 'updated_at'
+        )
+        # Quantities only change through stock updates, which keep the rollup in step
+        read_only_fields = ('product', 'location', 'quantity', 'updated_at')
+
+
+class StockLogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
     action_display = serializers.CharField(source='get_action_display', read_only=True)
     total_value = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    location_code = serializers.CharField(source='location.code', read_only=True, default=None)
 
     class Meta:
         model = StockLog
@@ -116,11 +242,24 @@ class StockLogSerializer(serializers.ModelSerializer):
             'id', 'product', 'product_name', 'product_sku', 'action', 'action_display',
             'quantity_change', 'previous_quantity', 'new_quantity', 'reason',
             'user', 'user_username', 'timestamp', 'reference_number', 
-            'unit_cost', 'total_value'
+            'unit_cost', 'total_value', 'location', 'location_code'
         )
         read_only_fields = ('timestamp', 'total_value')
 
 
+class StockAlertSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_sku = serializers.CharField(source='product.sku', read_only=True)
+
+    class Meta:
+        model = StockAlert
+        fields = (
+            'id', 'product', 'product_name', 'product_sku', 'kind', 'quantity',
+            'min_stock_level', 'stock_log', 'created_at'
+        )
+        read_only_fields = fields
+
+
 class StockUpdateSerializer(serializers.Serializer):
     """
     Serializer for stock updates with automatic logging
@@ -139,6 +278,10 @@ class StockUpdateSerializer(serializers.Serializer):
     reason = serializers.CharField(max_length=500, required=False, allow_blank=True)
     reference_number = serializers.CharField(max_length=100, required=False, allow_blank=True)
     unit_cost = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    # Stock without a location is the product's unassigned stock
+    location = serializers.SlugRelatedField(
+        slug_field='code', queryset=Location.objects.filter(is_active=True), required=False
+    )
 
     def validate_quantity_change(self, value):
         if value == 0:
@@ -149,21 +292,60 @@ class StockUpdateSerializer(serializers.Serializer):
         """
         Update product stock and create log entry
         """
+        location = validated_data.get('location')
+        if product.is_striped:
+            if location is not None:
+                raise serializers.ValidationError(
+                    "Striped products do not track stock by location"
+                )
+            return update_striped_stock(product, validated_data, user)
+        if (
+            settings.STOCK_GROUP_COMMIT and location is None
+            and not transaction.get_connection().in_atomic_block
+        ):
+            # Applied with other updates in one transaction; inside a caller's
+            # transaction it could not commit or roll back with it
+            return submit_stock_update(product, validated_data, user)
+
+        quantity_change = validated_data['quantity_change']
         with transaction.atomic():
-            previous_quantity = product.quantity
-            quantity_change = validated_data['quantity_change']
-            new_quantity = previous_quantity + quantity_change
+            if location is not None:
+                # Location row first, then the rollup: every location update
+                # takes its locks in the same order
+                apply_location_change(product, location, quantity_change)
+                condition = {'quantity__gte': -quantity_change}
+            else:
+                # Only unassigned stock can be taken without naming a location
+                condition = {'quantity__gte': allocated_quantity() - quantity_change}
 
-            if new_quantity < 0:
+            # Change the quantity in the database rather than writing back a
+            # value read earlier: the UPDATE locks the row until commit, so
+            # concurrent updates queue up instead of losing each other's change
+            updated = Product.objects.filter(pk=product.pk, **condition).update(
+                quantity=F('quantity') + quantity_change,
+                last_modified_by=user,
+                updated_at=timezone.now(),
+                version=F('version') + 1
+            )
+            current = Product.objects.values('quantity', 'updated_at', 'version').get(pk=product.pk)
+            if not updated:
+                allocated = allocated_by_product([product.pk]).get(product.pk, 0)
+                if allocated:
+                    raise serializers.ValidationError(
+                        f"Cannot reduce unassigned stock below 0. Unassigned stock: "
+                        f"{current['quantity'] - allocated}, Requested change: {quantity_change}"
+                    )
                 raise serializers.ValidationError(
-                    f"Cannot reduce stock below 0. Current stock: {previous_quantity}, "
+                    f"Cannot reduce stock below 0. Current stock: {current['quantity']}, "
                     f"Requested change: {quantity_change}"
                 )
 
-            # Update product quantity
+            new_quantity = current['quantity']
+            previous_quantity = new_quantity - quantity_change
             product.quantity = new_quantity
+            product.updated_at = current['updated_at']
+            product.version = current['version']
             product.last_modified_by = user
-            product.save(update_fields=['quantity', 'last_modified_by', 'updated_at'])
 
             # Create stock log entry
             stock_log = StockLog.objects.create(
@@ -175,12 +357,71 @@ class StockUpdateSerializer(serializers.Serializer):
                 reason=validated_data.get('reason', ''),
                 reference_number=validated_data.get('reference_number', ''),
                 unit_cost=validated_data.get('unit_cost'),
+                location=location,
                 user=user
             )
+            value_stock_logs(product, [stock_log])
+            record_stock_log_alerts([stock_log])
+
+            # Published by the webhook dispatcher once this transaction commits
+            enqueue_stock_event(stock_log)
 
             return product, stock_log
 
 
+class StockTransferLineSerializer(serializers.Serializer):
+    from_product = serializers.IntegerField()
+    to_product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        if attrs['from_product'] == attrs['to_product']:
+            raise serializers.ValidationError("Cannot transfer stock to the same product")
+        return attrs
+
+
+class StockTransferSerializer(serializers.Serializer):
+    """
+    Stock moved between products in one transaction
+    """
+    lines = StockTransferLineSerializer(many=True, allow_empty=False)
+    reason = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    reference_number = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate_lines(self, value):
+        if len(value) > settings.STOCK_TRANSFER_MAX_LINES:
+            raise serializers.ValidationError(
+                f"A transfer can have at most {settings.STOCK_TRANSFER_MAX_LINES} lines"
+            )
+        return value
+
+
+class ProductBatchSerializer(serializers.Serializer):
+    """
+    Products to fetch by id or by SKU, in the order they are wanted
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    skus = serializers.ListField(
+        child=serializers.CharField(max_length=Product._meta.get_field('sku').max_length),
+        required=False, allow_empty=False
+    )
+    fields = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+
+    def validate_skus(self, value):
+        return [sku.upper().strip() for sku in value]
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('skus' in attrs):
+            raise serializers.ValidationError("Provide either ids or skus")
+        keys = list(dict.fromkeys(attrs.get('ids') or attrs['skus']))
+        if len(keys) > settings.PRODUCT_BATCH_MAX_KEYS:
+            raise serializers.ValidationError(
+                f"A batch can fetch at most {settings.PRODUCT_BATCH_MAX_KEYS} products"
+            )
+        attrs['keys'] = keys
+        return attrs
+
+
 class InventoryReportSerializer(serializers.Serializer):
     """
     Serializer for inventory summary reports
@@ -194,4 +435,79 @@ class InventoryReportSerializer(serializers.Serializer):
     total_quantity = serializers.IntegerField()
     categories_count = serializers.IntegerField()
     suppliers_count = serializers.IntegerField()
-    recent_stock_changes = serializers.IntegerField()
\ No newline at end of file
+    recent_stock_changes = serializers.IntegerField()
+
+
+class AbcClassificationSerializer(serializers.Serializer):
+    """
+    A product's rank and class in an ABC analysis; ``metric`` is its stock
+    value or units sold, the shares are percentages of the total
+    """
+    id = serializers.IntegerField()
+    sku = serializers.CharField()
+    name = serializers.CharField()
+    rank = serializers.IntegerField()
+    metric = serializers.FloatField()
+    share = serializers.FloatField(allow_null=True)
+    cumulative_share = serializers.FloatField(allow_null=True)
+    abc_class = serializers.CharField(source='abc')
+    stored_abc_class = serializers.CharField(source='abc_class')
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """
+    Report job request and status
+    """
+    # Parameters accepted per kind; exports take the list endpoints' filters
+    PARAM_FIELDS = {
+        'inventory_report': ('category', 'supplier'),
+        'products_export': tuple(ProductFilter.base_filters),
+        'stock_logs_export': tuple(StockLogFilter.base_filters),
+    }
+    FILTERSETS = {
+        'products_export': (ProductFilter, Product),
+        'stock_logs_export': (StockLogFilter, StockLog),
+    }
+
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = (
+            'id', 'kind', 'kind_display', 'params', 'status', 'created_by_username',
+            'created_at', 'started_at', 'finished_at', 'row_count', 'error',
+            'expires_at', 'download_url'
+        )
+        read_only_fields = (
+            'status', 'created_at', 'started_at', 'finished_at', 'row_count',
+            'error', 'expires_at'
+        )
+
+    def get_download_url(self, obj):
+        if obj.status != 'succeeded':
+            return None
+        return f"/api/jobs/{obj.pk}/download/"
+
+    def validate(self, attrs):
+        kind = attrs['kind']
+        params = attrs.get('params') or {}
+        if not isinstance(params, dict):
+            raise serializers.ValidationError({'params': "Must be an object"})
+
+        unknown = sorted(set(params) - set(self.PARAM_FIELDS[kind]))
+        if unknown:
+            raise serializers.ValidationError({
+                'params': f"Unknown parameters for {kind}: {', '.join(unknown)}"
+            })
+
+        # Reject bad filter values now rather than failing the job later
+        if kind in self.FILTERSETS:
+            filterset_class, model = self.FILTERSETS[kind]
+            filterset = filterset_class(data=params, queryset=model.objects.none())
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'params': filterset.errors})
+
+        attrs['params'] = params
+        return attrs
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Product, ProductTombstone
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so delta sync clients learn about the deletion"""
+    ProductTombstone.objects.create(product_id=instance.pk, sku=instance.sku)
@@ -0,0 +1,108 @@
+import logging
+import os
+import queue
+import random
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue(maxsize=100)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def explain(alias, sql, params):
+    """Plan of a SELECT statement, without executing it"""
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return ''
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+
+
+def store(entry):
+    from .models import SlowQuery
+
+    plan = ''
+    if entry.pop('explain'):
+        try:
+            plan = explain(entry['alias'], entry['sql'], entry['raw_params'])
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+    del entry['alias'], entry['raw_params']
+
+    SlowQuery.objects.create(plan=plan, **entry)
+
+    # Rotate: keep only the newest SLOW_QUERY_LOG_MAX_ROWS entries
+    cutoff = (
+        SlowQuery.objects.order_by('-id')
+        .values_list('id', flat=True)[settings.SLOW_QUERY_LOG_MAX_ROWS:settings.SLOW_QUERY_LOG_MAX_ROWS + 1]
+    )
+    if cutoff:
+        SlowQuery.objects.filter(id__lte=cutoff[0]).delete()
+
+
+def _run():
+    while True:
+        entry = _queue.get()
+        # This thread keeps its connection between entries; replace it once
+        # it has failed or outlived CONN_MAX_AGE, as a request would
+        close_old_connections()
+        try:
+            store(entry)
+        except Exception:
+            logger.exception("Could not record slow query")
+
+
+def _ensure_worker():
+    global _worker
+    # Threads do not survive a fork, so each gunicorn worker starts its own
+    if _worker is not None and _worker[0] == os.getpid():
+        return
+    with _worker_lock:
+        if _worker is None or _worker[0] != os.getpid():
+            thread = threading.Thread(target=_run, name='slow-query-log', daemon=True)
+            thread.start()
+            _worker = (os.getpid(), thread)
+
+
+def report_slow_query(request, alias, sql, params, duration):
+    """
+    Log a slow query and hand it to the background recorder, which stores it
+    and runs EXPLAIN on a sample of SELECTs
+    """
+    match = getattr(request, 'resolver_match', None)
+    view_name = match.view_name if match else ''
+    duration_ms = duration * 1000
+    logger.warning(
+        "Slow query (%.1fms) in %s %s [%s] params=%s: %s",
+        duration_ms, request.method, request.path, view_name, dict(request.GET), sql[:500]
+    )
+
+    is_select = sql.lstrip()[:6].upper() == 'SELECT'
+    entry = {
+        'alias': alias,
+        'sql': sql,
+        'raw_params': params,
+        'params': repr(params),
+        'duration_ms': duration_ms,
+        'view_name': view_name or '',
+        'method': request.method,
+        'path': request.path[:500],
+        'query_params': {key: request.GET.getlist(key) for key in request.GET},
+        'explain': is_select and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    }
+    _ensure_worker()
+    try:
+        _queue.put_nowait(entry)
+    except queue.Full:
+        # Never slow the request down to record a slow query
+        pass
@@ -0,0 +1,45 @@
+"""
+SQLite profile for single-node deployments (``SQLITE_TUNING``).
+
+With the default rollback journal a writer blocks every reader, and a
+transaction that reads before it writes takes a shared lock it later has to
+upgrade: two of those deadlock and one fails at once with "database is
+locked", whatever the busy timeout. WAL lets readers run alongside the
+writer, and starting ``atomic`` blocks with ``BEGIN IMMEDIATE`` takes the
+write lock up front, so writers queue on the busy timeout instead.
+"""
+import types
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': 'WAL',
+        # Durable at checkpoints rather than every commit; WAL cannot corrupt
+        # the database at this level, a power loss can drop the last commits
+        'synchronous': 'NORMAL',
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT_MS,
+        'mmap_size': settings.SQLITE_MMAP_SIZE,
+        # Negative values are KiB rather than pages
+        'cache_size': -settings.SQLITE_CACHE_SIZE_KB,
+    }
+
+
+def begin_immediate(self):
+    """``_start_transaction_under_autocommit`` taking the write lock at BEGIN"""
+    self.cursor().execute('BEGIN IMMEDIATE')
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    # Every outermost atomic block starts with it; savepoints are unaffected
+    connection._start_transaction_under_autocommit = types.MethodType(begin_immediate, connection)
+    connection.begins_immediate = True
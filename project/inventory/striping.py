@@ -0,0 +1,182 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from .alerts import record_stock_log_alerts
+from .models import Product, ProductStockShard, StockLog
+from .valuation import value_stock_logs
+from .webhooks import enqueue_stock_events
+
+
+def shard_total(product):
+    return ProductStockShard.objects.filter(product=product).aggregate(
+        total=Sum('quantity', default=0)
+    )['total']
+
+
+def add_to_shards(product, amount):
+    """Increments never fail, so any shard will do"""
+    updated = ProductStockShard.objects.filter(
+        product=product, index=random.randrange(product.stock_shards)
+    ).update(quantity=F('quantity') + amount)
+    if not updated:
+        # Striping was changed since the product was loaded
+        raise serializers.ValidationError("Product stock layout changed, please retry")
+
+
+def take_from_shards(product, amount):
+    """
+    Remove ``amount`` units from the product's shards without going below 0.
+
+    The fast path takes it all from one shard with a conditional UPDATE: an
+    unlocked one where the database can skip locked rows, otherwise a random
+    one. When that shard runs dry the units are borrowed from its siblings,
+    with every shard locked in index order so borrowers cannot deadlock.
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        index = (
+            ProductStockShard.objects.select_for_update(skip_locked=True)
+            .filter(product=product, quantity__gte=amount)
+            .order_by('?').values_list('index', flat=True).first()
+        )
+    else:
+        index = random.randrange(product.stock_shards)
+
+    if index is not None and ProductStockShard.objects.filter(
+        product=product, index=index, quantity__gte=amount
+    ).update(quantity=F('quantity') - amount):
+        return
+
+    shards = list(
+        ProductStockShard.objects.select_for_update()
+        .filter(product=product).order_by('index')
+    )
+    available = sum(shard.quantity for shard in shards)
+    if available < amount:
+        raise serializers.ValidationError(
+            f"Cannot reduce stock below 0. Current stock: {available}, "
+            f"Requested change: {-amount}"
+        )
+
+    remaining = amount
+    for shard in sorted(shards, key=lambda shard: -shard.quantity):
+        taken = min(shard.quantity, remaining)
+        if taken:
+            ProductStockShard.objects.filter(pk=shard.pk).update(quantity=F('quantity') - taken)
+            remaining -= taken
+        if not remaining:
+            break
+
+
+def update_striped_stock(product, validated_data, user):
+    """
+    Apply a stock change to a striped product without touching its row.
+
+    The log is written unfolded; ``previous_quantity``/``new_quantity`` are
+    provisional until ``fold_product`` places it in the ledger.
+    """
+    quantity_change = validated_data['quantity_change']
+    with transaction.atomic():
+        if quantity_change > 0:
+            add_to_shards(product, quantity_change)
+        else:
+            take_from_shards(product, -quantity_change)
+        new_quantity = shard_total(product)
+
+        stock_log = StockLog.objects.create(
+            product=product,
+            action=validated_data['action'],
+            quantity_change=quantity_change,
+            previous_quantity=new_quantity - quantity_change,
+            new_quantity=new_quantity,
+            reason=validated_data.get('reason', ''),
+            reference_number=validated_data.get('reference_number', ''),
+            unit_cost=validated_data.get('unit_cost'),
+            user=user,
+            is_folded=False
+        )
+
+    # The response shows the live quantity; the row catches up on the next fold
+    product.quantity = new_quantity
+    return product, stock_log
+
+
+def fold_product(product_id, settle_before=None):
+    """
+    Fold a striped product's pending logs into ``Product.quantity``.
+
+    Pending logs are chained in ledger order from the current quantity and
+    their webhook events are published. Logs newer than ``settle_before``
+    wait for the next fold so one still committing cannot be chained ahead
+    of an older one. Returns the number of logs folded.
+    """
+    if settle_before is None:
+        settle_before = timezone.now() - timedelta(seconds=settings.STOCK_FOLD_SETTLE_SECONDS)
+
+    with transaction.atomic():
+        # NO KEY UPDATE lets writers keep inserting logs that reference the row
+        product = Product.objects.select_for_update(no_key=True).get(pk=product_id)
+        logs = list(
+            StockLog.objects.filter(
+                product=product, is_folded=False, timestamp__lte=settle_before
+            ).order_by('timestamp', 'id')
+        )
+        if not logs:
+            return 0
+
+        quantity = product.quantity
+        for stock_log in logs:
+            stock_log.product = product
+            stock_log.previous_quantity = quantity
+            quantity += stock_log.quantity_change
+            stock_log.new_quantity = quantity
+            stock_log.is_folded = True
+        StockLog.objects.bulk_update(logs, ['previous_quantity', 'new_quantity', 'is_folded'])
+        value_stock_logs(product, logs)
+        record_stock_log_alerts(logs)
+
+        product.quantity = quantity
+        product.version += 1
+        product.save(update_fields=['quantity', 'version', 'updated_at'])
+        enqueue_stock_events(logs)
+        return len(logs)
+
+
+def fold_pending(settle_before=None):
+    """Fold every product with pending logs; returns the number of logs folded"""
+    product_ids = (
+        StockLog.objects.filter(is_folded=False)
+        .order_by().values_list('product_id', flat=True).distinct()
+    )
+    return sum(fold_product(product_id, settle_before) for product_id in list(product_ids))
+
+
+def set_stock_shards(product, shards):
+    """
+    Stripe a product across ``shards`` counter rows, or back to a single row
+    with 0. Pending changes are folded first so the ledger stays continuous.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product.pk)
+        if product.is_striped:
+            # Everything pending, however recent: the shards are about to go
+            fold_product(product.pk, settle_before=timezone.now())
+            product.refresh_from_db()
+            ProductStockShard.objects.filter(product=product).delete()
+
+        if shards:
+            base, extra = divmod(product.quantity, shards)
+            ProductStockShard.objects.bulk_create([
+                ProductStockShard(product=product, index=i, quantity=base + (1 if i < extra else 0))
+                for i in range(shards)
+            ])
+
+        product.stock_shards = shards
+        product.version += 1
+        product.save(update_fields=['stock_shards', 'version', 'updated_at'])
+        return product
@@ -0,0 +1,92 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'600/min'`` -> ``(600, 60)``: units a caller may spend per window, and its seconds"""
+    tokens, period = rate.split('/')
+    return int(tokens), PERIODS[period[0]]
+
+
+def throttle_cost(cost):
+    """
+    Declare what a view costs against the caller's allowance: a key of
+    ``THROTTLE_COSTS``. Class-based views can set a ``throttle_cost``
+    attribute instead. Apply above ``@api_view`` like ``@query_budget``.
+    """
+    def decorator(view):
+        target = getattr(view, 'cls', view)
+        target.throttle_cost = cost
+        return view
+    return decorator
+
+
+def request_cost(request, view):
+    cost = getattr(view, 'throttle_cost', None)
+    if cost is None:
+        cost = 'read' if request.method in SAFE_METHODS else 'write'
+    return cost
+
+
+class RoleFixedWindowThrottle(BaseThrottle):
+    """
+    Fixed window counter per user (per client IP when anonymous): each
+    window of the role's ``THROTTLE_RATES`` period allows its number of
+    units, and requests spend ``THROTTLE_COSTS`` units by kind.
+
+    The counter is a cache key per window, so spending is one atomic
+    ``incr`` and concurrent workers sharing the cache cannot overspend it.
+    The allowance resets in full when the window rolls over: a client can
+    spend up to twice the rate across a boundary. Needs a cache shared by
+    all workers (Redis or Memcached) when running more than one process.
+    """
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        user = request.user
+        role = user.role if user and user.is_authenticated else 'anon'
+        rate = settings.THROTTLE_RATES.get(role)
+        if rate is None:
+            return True
+
+        capacity, period = parse_rate(rate)
+        kind = request_cost(request, view)
+        cost = settings.THROTTLE_COSTS[kind]
+        now = time.time()
+        window = int(now // period)
+        ident = user.pk if user and user.is_authenticated else self.get_ident(request)
+        key = f'throttle:{role}:{ident}:{window}'
+
+        if self.take(key, cost, period) <= capacity:
+            return True
+
+        # Refused requests do not spend their cost
+        try:
+            cache.decr(key, cost)
+        except ValueError:
+            pass
+        self.wait_seconds = (window + 1) * period - now
+        metrics.increment('throttled_requests_total', {'role': role, 'cost': kind})
+        return False
+
+    def take(self, key, cost, period):
+        try:
+            return cache.incr(key, cost)
+        except ValueError:
+            # First request of the period; another worker may create it first
+            if cache.add(key, cost, timeout=period + 1):
+                return cost
+            return cache.incr(key, cost)
+
+    def wait(self):
+        return math.ceil(self.wait_seconds)
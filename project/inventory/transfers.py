@@ -0,0 +1,153 @@
+import logging
+import random
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import metrics
+from .alerts import record_stock_log_alerts
+from .locations import allocated_by_product
+from .models import Product, StockLog
+from .striping import add_to_shards, shard_total, take_from_shards
+from .valuation import value_transfer
+from .webhooks import enqueue_stock_events
+
+logger = logging.getLogger(__name__)
+
+# serialization_failure, deadlock_detected
+RETRYABLE_PGCODES = ('40001', '40P01')
+
+
+def is_retryable(error):
+    """Errors that mean "run the transaction again", not "the transfer is invalid" """
+    cause = error.__cause__
+    if getattr(cause, 'pgcode', None) in RETRYABLE_PGCODES:
+        return True
+    # SQLite refuses to upgrade a read lock while another writer is active
+    return 'database is locked' in str(error)
+
+
+def new_reference_number():
+    return f"TRF-{uuid.uuid4().hex[:12].upper()}"
+
+
+def transfer_stock(lines, user, reason='', reference_number=''):
+    """
+    Move stock between products in one transaction.
+
+    ``lines`` is a list of ``(from_product_id, to_product_id, quantity)``.
+    Every log written shares ``reference_number``. Retried on serialization
+    failures and deadlocks. Returns ``(reference_number, stock_logs)``.
+    """
+    reference_number = reference_number or new_reference_number()
+    attempt = 1
+    while True:
+        try:
+            with transaction.atomic():
+                return reference_number, apply_transfer(lines, user, reason, reference_number)
+        except OperationalError as e:
+            if attempt >= settings.STOCK_TRANSFER_MAX_ATTEMPTS or not is_retryable(e):
+                raise
+            metrics.increment('stock_transfer_retries_total', {})
+            logger.info("Transfer %s attempt %d failed, retrying: %s", reference_number, attempt, e)
+            # Jittered backoff so the transactions that collided do not collide again
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+            attempt += 1
+
+
+def apply_transfer(lines, user, reason, reference_number):
+    """Body of ``transfer_stock``; must run inside a transaction"""
+    product_ids = sorted({pid for from_id, to_id, _ in lines for pid in (from_id, to_id)})
+
+    if not connection.features.has_select_for_update and not getattr(connection, 'begins_immediate', False):
+        # No row locks (SQLite): take the database write lock before reading,
+        # a read lock cannot be upgraded while another writer is active.
+        # Already held when the transaction began with BEGIN IMMEDIATE
+        Product.objects.filter(pk__in=product_ids).update(updated_at=F('updated_at'))
+
+    # Lock every row in id order: two transfers touching the same products
+    # queue up behind each other instead of deadlocking
+    products = {
+        product.pk: product
+        for product in Product.objects.select_for_update(no_key=True)
+        .filter(pk__in=product_ids, is_active=True).order_by('pk')
+    }
+    missing = [pid for pid in product_ids if pid not in products]
+    if missing:
+        raise serializers.ValidationError(
+            f"Products not found or inactive: {', '.join(map(str, missing))}"
+        )
+
+    net_change = defaultdict(int)
+    for from_id, to_id, quantity in lines:
+        net_change[from_id] -= quantity
+        net_change[to_id] += quantity
+
+    # Striped products move stock on their shards, in the same id order
+    live_quantity = {}
+    for pid in product_ids:
+        product = products[pid]
+        if not product.is_striped or not net_change[pid]:
+            continue
+        if net_change[pid] > 0:
+            add_to_shards(product, net_change[pid])
+        else:
+            take_from_shards(product, -net_change[pid])
+        live_quantity[pid] = shard_total(product)
+
+    now = timezone.now()
+    quantities = {pid: products[pid].quantity for pid in product_ids}
+    # Transfers move unassigned stock; units held at a location stay there
+    allocated = allocated_by_product(product_ids)
+    stock_logs = []
+    for from_id, to_id, quantity in lines:
+        for pid, change in ((from_id, -quantity), (to_id, quantity)):
+            product = products[pid]
+            previous_quantity = quantities[pid]
+            quantities[pid] += change
+            # Checked line by line so no log in the chain shows negative stock
+            if quantities[pid] < allocated.get(pid, 0) and not product.is_striped:
+                raise serializers.ValidationError(
+                    f"Cannot reduce stock of {product.sku} below 0. Current stock: "
+                    f"{product.quantity - allocated.get(pid, 0)}, Requested change: {net_change[pid]}"
+                )
+            stock_logs.append(StockLog(
+                product=product,
+                action='transfer',
+                quantity_change=change,
+                previous_quantity=previous_quantity,
+                new_quantity=quantities[pid],
+                reason=reason,
+                reference_number=reference_number,
+                user=user,
+                # Placed in the ledger by the folder
+                is_folded=not product.is_striped
+            ))
+
+    changed = []
+    for pid in product_ids:
+        product = products[pid]
+        if product.is_striped:
+            product.quantity = live_quantity.get(pid, product.quantity)
+            continue
+        product.quantity = quantities[pid]
+        product.last_modified_by = user
+        product.updated_at = now
+        # Read under the lock, so a plain increment is safe
+        product.version += 1
+        changed.append(product)
+
+    if changed:
+        Product.objects.bulk_update(changed, ['quantity', 'last_modified_by', 'updated_at', 'version'])
+    StockLog.objects.bulk_create(stock_logs)
+    value_transfer(stock_logs, products)
+    record_stock_log_alerts(stock_logs)
+    # Pending logs of striped products are published when they are folded
+    enqueue_stock_events([stock_log for stock_log in stock_logs if stock_log.is_folded])
+    return stock_logs
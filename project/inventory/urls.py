@@ -1,6 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_READ_PATH:
+    # ASGI deployment: report and list reads are served by async views
+    from . import async_views as read_views
+    product_list = read_views.product_list
+    stock_log_list = read_views.stock_log_list
+else:
+    read_views = views
+    product_list = views.ProductListCreateView.as_view()
+    stock_log_list = views.StockLogListView.as_view()
+
 urlpatterns = [
     # User Management
     path('users/', views.UserListCreateView.as_view(), name='user-list-create'),
@@ -14,17 +25,44 @@ urlpatterns = [
     path('suppliers/', views.SupplierListCreateView.as_view(), name='supplier-list-create'),
     path('suppliers/<int:pk>/', views.SupplierDetailView.as_view(), name='supplier-detail'),
     
+    # Location Management
+    path('locations/', views.LocationListCreateView.as_view(), name='location-list-create'),
+    path('locations/<int:pk>/', views.LocationDetailView.as_view(), name='location-detail'),
+    path('locations/<int:location_id>/stock/', views.LocationStockListView.as_view(), name='location-stock'),
+    path(
+        'locations/<int:location_id>/stock/<int:product_id>/',
+        views.LocationStockDetailView.as_view(),
+        name='location-stock-detail'
+    ),
+
     # Product Management
-    path('products/', views.ProductListCreateView.as_view(), name='product-list-create'),
+    path('products/', product_list, name='product-list-create'),
     path('products/<int:pk>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('products/changes/', views.product_changes, name='product-changes'),
+    path('products/batch/', views.product_batch, name='product-batch'),
     
     # Stock Management
-    path('stock-logs/', views.StockLogListView.as_view(), name='stock-log-list'),
+    path('stock-logs/', stock_log_list, name='stock-log-list'),
     path('products/<int:product_id>/stock-logs/', views.ProductStockLogView.as_view(), name='product-stock-logs'),
     path('products/<int:product_id>/update-stock/', views.update_product_stock, name='update-product-stock'),
+    path('products/<int:product_id>/locations/', views.product_location_stock, name='product-location-stock'),
+    path('stock/transfers/', views.transfer_product_stock, name='stock-transfer'),
+    path('stock/alerts/', views.StockAlertListView.as_view(), name='stock-alert-list'),
     
     # Reports & Analytics
-    path('reports/inventory/', views.inventory_report, name='inventory-report'),
-    path('reports/low-stock/', views.low_stock_products, name='low-stock-products'),
-    path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
+    path('reports/inventory/', read_views.inventory_report, name='inventory-report'),
+    path('reports/low-stock/', read_views.low_stock_products, name='low-stock-products'),
+    path('reports/locations/', views.location_stock_report, name='location-stock-report'),
+    path('reports/valuation/', views.valuation_report, name='valuation-report'),
+    path('reports/abc/', views.AbcAnalysisView.as_view(), name='abc-analysis'),
+    path('dashboard/stats/', read_views.dashboard_stats, name='dashboard-stats'),
+
+    # Background Report Jobs
+    path('jobs/', views.ReportJobListCreateView.as_view(), name='report-job-list-create'),
+    path('jobs/<uuid:pk>/', views.ReportJobDetailView.as_view(), name='report-job-detail'),
+    path('jobs/<uuid:pk>/download/', views.ReportJobDownloadView.as_view(), name='report-job-download'),
+
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
+    path('profiles/<uuid:profile_id>/', views.profile_report, name='profile-report'),
 ]
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Inventory valued at cost.
+
+Every product keeps FIFO cost layers and a weighted average cost. Both are
+updated by each stock movement as it enters the ledger, in the
+transaction that writes it; ``rebuild_valuation`` replays the ledger to
+recompute them from scratch.
+
+Units arriving without a cost (returns, adjustments without ``unit_cost``,
+quantity edits, opening stock) are valued at the product's average cost,
+or at its price while it has none.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import CostLayer, ProductValuation, StockLog
+
+COST_PLACES = Decimal('0.0001')
+
+
+class CostState:
+    """
+    The open layers and running average of one product, changed in memory
+    and written back by ``save``.
+    """
+
+    def __init__(self, product, valuation, layers):
+        self.product = product
+        self.valuation = valuation
+        # Layers with units remaining, oldest first
+        self.layers = layers
+        self.new_layers = []
+        self.changed_layers = []
+
+    @classmethod
+    def opening(cls, product, quantity, received_at=None):
+        """State of a product without a valuation: ``quantity`` units of opening stock"""
+        state = cls(product, ProductValuation(product=product), [])
+        if quantity > 0:
+            state.receive(quantity, None, received_at or product.created_at)
+        return state
+
+    def fallback_cost(self):
+        if self.valuation.average_cost:
+            return self.valuation.average_cost
+        return self.product.price
+
+    def receive(self, quantity, unit_cost, received_at, stock_log=None):
+        """Add ``quantity`` units at ``unit_cost``; returns the cost used"""
+        valuation = self.valuation
+        unit_cost = (unit_cost if unit_cost is not None else self.fallback_cost()).quantize(COST_PLACES)
+        total = valuation.quantity + quantity
+        valuation.average_cost = (
+            (valuation.average_cost * valuation.quantity + unit_cost * quantity) / total
+        ).quantize(COST_PLACES)
+        valuation.quantity = total
+
+        layer = CostLayer(
+            product=self.product,
+            stock_log=stock_log,
+            received_at=received_at,
+            unit_cost=unit_cost,
+            quantity=quantity,
+            remaining=quantity
+        )
+        self.layers.append(layer)
+        self.new_layers.append(layer)
+        return unit_cost
+
+    def issue(self, quantity):
+        """Take ``quantity`` units from the oldest layers; returns their cost"""
+        cost = Decimal(0)
+        wanted = quantity
+        while wanted and self.layers:
+            layer = self.layers[0]
+            taken = min(layer.remaining, wanted)
+            layer.remaining -= taken
+            cost += taken * layer.unit_cost
+            wanted -= taken
+            if layer.pk is not None and not any(layer is changed for changed in self.changed_layers):
+                self.changed_layers.append(layer)
+            if not layer.remaining:
+                self.layers.pop(0)
+        # Units the layers do not cover leave at the average cost
+        cost += wanted * self.valuation.average_cost
+        self.valuation.quantity = max(self.valuation.quantity - quantity, 0)
+        return cost
+
+    def adjust_to(self, quantity, at):
+        """Value units that appeared or went without a stock log (quantity edits)"""
+        if quantity > self.valuation.quantity:
+            self.receive(quantity - self.valuation.quantity, None, at)
+        elif quantity < self.valuation.quantity:
+            self.issue(self.valuation.quantity - quantity)
+
+    def apply(self, stock_log):
+        if stock_log.quantity_change > 0:
+            return self.receive(
+                stock_log.quantity_change, stock_log.unit_cost, stock_log.timestamp, stock_log
+            )
+        return self.issue(-stock_log.quantity_change)
+
+    def save(self):
+        save_cost_states([self])
+
+
+def load_cost_states(products, quantities_before):
+    """
+    Current state of each product, in two queries. The caller must hold the
+    products' row locks; products valued for the first time start from
+    their ``quantities_before`` units of opening stock.
+    """
+    valuations = ProductValuation.objects.in_bulk([product.pk for product in products])
+    layers = defaultdict(list)
+    if valuations:
+        open_layers = CostLayer.objects.filter(
+            product__in=list(valuations), remaining__gt=0
+        ).order_by('product', 'received_at', 'id')
+        for layer in open_layers:
+            layers[layer.product_id].append(layer)
+    return {
+        product.pk: (
+            CostState(product, valuations[product.pk], layers[product.pk]) if product.pk in valuations
+            else CostState.opening(product, quantities_before[product.pk])
+        )
+        for product in products
+    }
+
+
+def load_cost_state(product, quantity_before):
+    return load_cost_states([product], {product.pk: quantity_before})[product.pk]
+
+
+def save_cost_states(states):
+    new_layers = []
+    changed_layers = []
+    new_valuations = []
+    valuations = []
+    for state in states:
+        state.valuation.fifo_value = sum(
+            (layer.remaining * layer.unit_cost for layer in state.layers), Decimal(0)
+        )
+        new_layers += state.new_layers
+        changed_layers += state.changed_layers
+        (new_valuations if state.valuation._state.adding else valuations).append(state.valuation)
+        state.new_layers = []
+        state.changed_layers = []
+
+    CostLayer.objects.bulk_create(new_layers)
+    if changed_layers:
+        CostLayer.objects.bulk_update(changed_layers, ['remaining'])
+    now = timezone.now()
+    for valuation in new_valuations + valuations:
+        valuation.updated_at = now
+    ProductValuation.objects.bulk_create(new_valuations)
+    if valuations:
+        ProductValuation.objects.bulk_update(valuations, ['quantity', 'average_cost', 'fifo_value', 'updated_at'])
+
+
+def value_stock_logs(product, stock_logs):
+    """Value stock logs of one product as they enter the ledger, in ledger order"""
+    if not stock_logs:
+        return
+    state = load_cost_state(product, stock_logs[0].previous_quantity)
+    for stock_log in stock_logs:
+        state.apply(stock_log)
+    state.save()
+
+
+def value_quantity_change(product, quantity_before, quantity_after):
+    """Value a quantity set directly on the product rather than by a stock update"""
+    if quantity_before == quantity_after:
+        return
+    state = load_cost_state(product, quantity_before)
+    state.adjust_to(state.valuation.quantity + quantity_after - quantity_before, timezone.now())
+    state.save()
+
+
+def value_transfer(stock_logs, products):
+    """
+    Value the (from, to) log pairs of a transfer: units arrive at the cost
+    they left the other product with, rounded to the incoming log's
+    ``unit_cost`` so that a rebuild from the ledger receives the same.
+    Striped products are valued when their logs are folded; units leaving
+    one carry its average cost.
+    """
+    quantities_before = {}
+    for stock_log in stock_logs:
+        quantities_before.setdefault(stock_log.product_id, stock_log.previous_quantity)
+    states = load_cost_states(
+        [products[pid] for pid in quantities_before if not products[pid].is_striped], quantities_before
+    )
+    striped = [pid for pid in quantities_before if products[pid].is_striped]
+    striped_valuations = ProductValuation.objects.in_bulk(striped) if striped else {}
+
+    for outgoing_log, incoming_log in zip(stock_logs[::2], stock_logs[1::2]):
+        source = products[outgoing_log.product_id]
+        quantity = incoming_log.quantity_change
+        if source.is_striped:
+            valuation = striped_valuations.get(source.pk)
+            unit_cost = valuation.average_cost if valuation and valuation.average_cost else source.price
+        else:
+            unit_cost = states[source.pk].issue(quantity) / quantity
+        incoming_log.unit_cost = unit_cost.quantize(Decimal('0.01'))
+
+        if incoming_log.product_id in states:
+            states[incoming_log.product_id].receive(
+                quantity, incoming_log.unit_cost, incoming_log.timestamp, incoming_log
+            )
+
+    save_cost_states(states.values())
+    StockLog.objects.bulk_update(stock_logs[1::2], ['unit_cost'])
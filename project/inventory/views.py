@@ -1,19 +1,43 @@
-from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+import os
+
+from rest_framework import generics, status, permissions, serializers
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import FileResponse
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Sum, Count, Q, F, Max, OuterRef, Subquery, ProtectedError
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import Product, Category, Supplier, StockLog
+from .models import (
+    Product, Category, Supplier, StockLog, ReportJob, Location, ProductLocationStock, StockAlert
+)
 from .serializers import (
     UserSerializer, ProductSerializer, CategorySerializer, 
     SupplierSerializer, StockLogSerializer, StockUpdateSerializer,
-    InventoryReportSerializer
+    StockTransferSerializer, ReportJobSerializer, LocationSerializer,
+    ProductLocationStockSerializer, ProductBatchSerializer, AbcClassificationSerializer,
+    StockAlertSerializer
+)
+from .permissions import (
+    RoleBasedPermission, IsAdminOrReadOnly, StockLogPermission, IsAdminRole,
+    ReportJobPermission, ProductBatchPermission
 )
-from .permissions import RoleBasedPermission, IsAdminOrReadOnly, StockLogPermission
-from .filters import ProductFilter, StockLogFilter
+from .filters import ProductFilter, StockAlertFilter, StockLogFilter
+from .conditional import ConditionalListMixin, ConditionalObjectMixin, make_etag
+from .idempotency import IdempotentCreateMixin, idempotent
+from .sync import InvalidCursor, changes_since, decode_cursor
+from .metrics import PrometheusRenderer, render_prometheus
+from .instrumentation import query_budget
+from .throttling import throttle_cost
+from .pagination import EstimatedCountPagination, StockAlertPagination
+from .profiling import load_report
+from .reports import build_inventory_report
+from .jobs import job_content_type, job_result_path
+from .transfers import transfer_stock
+from .classification import BASES, classify
 
 User = get_user_model()
 
@@ -23,6 +47,7 @@ class UserListCreateView(generics.ListCreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminOrReadOnly]
+    query_budget = 6
     filterset_fields = ['role', 'is_active']
     search_fields = ['username', 'email']
     ordering_fields = ['username', 'email', 'created_at']
@@ -33,49 +58,145 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminOrReadOnly]
+    query_budget = 12
+
+
+def with_active_products_count(queryset, field):
+    """
+    Annotate each row with its active product count in the same query,
+    instead of one COUNT per serialized row
+    """
+    counts = (
+        Product.objects.filter(**{field: OuterRef('pk')}, is_active=True)
+        .order_by().values(field).annotate(count=Count('pk')).values('count')
+    )
+    return queryset.annotate(active_products_count=Coalesce(Subquery(counts), 0))
+
+
+class ProductsCountConditionalMixin(ConditionalListMixin):
+    """
+    Category and supplier bodies embed active product counts, so their ETags
+    also depend on the product table
+    """
+
+    def get_etag_state(self, queryset):
+        state = super().get_etag_state(queryset)
+        state.update(Product.objects.aggregate(
+            products_modified=Max('updated_at'),
+            active_products=Count('pk', filter=Q(is_active=True))
+        ))
+        return state
 
 
 # Category Management Views
-class CategoryListCreateView(generics.ListCreateAPIView):
-    queryset = Category.objects.all()
+class CategoryListCreateView(ProductsCountConditionalMixin, generics.ListCreateAPIView):
+    queryset = with_active_products_count(Category.objects.all(), 'category')
     serializer_class = CategorySerializer
     permission_classes = [RoleBasedPermission]
+    query_budget = 8
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Category.objects.all()
+    queryset = with_active_products_count(Category.objects.all(), 'category')
     serializer_class = CategorySerializer
     permission_classes = [RoleBasedPermission]
+    query_budget = 8
 
 
 # Supplier Management Views
-class SupplierListCreateView(generics.ListCreateAPIView):
-    queryset = Supplier.objects.all()
+class SupplierListCreateView(ProductsCountConditionalMixin, generics.ListCreateAPIView):
+    queryset = with_active_products_count(Supplier.objects.all(), 'supplier')
     serializer_class = SupplierSerializer
     permission_classes = [RoleBasedPermission]
+    query_budget = 8
     search_fields = ['name', 'contact_person', 'email']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
 
 class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Supplier.objects.all()
+    queryset = with_active_products_count(Supplier.objects.all(), 'supplier')
     serializer_class = SupplierSerializer
     permission_classes = [RoleBasedPermission]
+    query_budget = 8
+
+
+# Location Management Views
+class LocationListCreateView(generics.ListCreateAPIView):
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+    permission_classes = [RoleBasedPermission]
+    query_budget = 6
+    search_fields = ['code', 'name']
+    ordering_fields = ['code', 'name', 'created_at']
+    ordering = ['code']
+
+
+class LocationDetailView(generics.RetrieveUpdateDestroyAPIView):
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+    permission_classes = [RoleBasedPermission]
+    query_budget = 8
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {'error': 'Location has stock or stock history; deactivate it instead'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class LocationStockListView(generics.ListAPIView):
+    serializer_class = ProductLocationStockSerializer
+    permission_classes = [RoleBasedPermission]
+    query_budget = 5
+    search_fields = ['product__name', 'product__sku']
+    ordering_fields = ['quantity', 'product__sku', 'updated_at']
+    ordering = ['product__sku']
+
+    def get_queryset(self):
+        queryset = ProductLocationStock.objects.filter(
+            location_id=self.kwargs['location_id']
+        ).select_related('product', 'location')
+        if self.request.query_params.get('low_stock') == 'true':
+            queryset = queryset.filter(quantity__lte=F('min_stock_level'))
+        return queryset
+
+
+class LocationStockDetailView(generics.RetrieveUpdateAPIView):
+    serializer_class = ProductLocationStockSerializer
+    permission_classes = [RoleBasedPermission]
+    query_budget = 5
+    lookup_field = 'product_id'
+
+    def get_queryset(self):
+        return ProductLocationStock.objects.filter(
+            location_id=self.kwargs['location_id']
+        ).select_related('product', 'location')
 
 
 # Product Management Views
-class ProductListCreateView(generics.ListCreateAPIView):
+class ProductListCreateView(IdempotentCreateMixin, ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Product.objects.select_related('category', 'supplier', 'created_by', 'last_modified_by')
     serializer_class = ProductSerializer
     permission_classes = [RoleBasedPermission]
+    pagination_class = EstimatedCountPagination
+    query_budget = 26
     filterset_class = ProductFilter
     search_fields = ['name', 'sku', 'description']
     ordering_fields = ['name', 'sku', 'quantity', 'price', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    etag_aggregates = {
+        **ConditionalListMixin.etag_aggregates,
+        # Category and supplier names are embedded in the product body
+        'category_modified': Max('category__updated_at'),
+        'supplier_modified': Max('supplier__updated_at'),
+    }
 
     def perform_create(self, serializer):
         serializer.save(
@@ -84,45 +205,139 @@ class ProductListCreateView(generics.ListCreateAPIView):
         )
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailView(ConditionalObjectMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.select_related('category', 'supplier', 'created_by', 'last_modified_by')
     serializer_class = ProductSerializer
     permission_classes = [RoleBasedPermission]
+    query_budget = 12
+
+    def get_validators(self, obj):
+        # The version changes with every write to the product, so If-Match
+        # with this ETag only succeeds against the version the client read.
+        # refresh_abc_classes leaves the version alone, hence abc_class.
+        etag = make_etag(
+            obj.pk, obj.version, obj.abc_class,
+            obj.category.updated_at if obj.category else None,
+            obj.supplier.updated_at if obj.supplier else None
+        )
+        return etag, obj.updated_at
 
     def perform_update(self, serializer):
         serializer.save(last_modified_by=self.request.user)
 
 
+@query_budget(3)
+@throttle_cost('read')
+@api_view(['POST'])
+@permission_classes([ProductBatchPermission])
+def product_batch(request):
+    """
+    Fetch many products by id or SKU in one query, in request order
+    """
+    serializer = ProductBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    key_field = 'pk' if 'ids' in data else 'sku'
+    products = {
+        getattr(product, key_field): product
+        for product in ProductListCreateView.queryset.filter(**{f'{key_field}__in': data['keys']})
+    }
+    return Response({
+        'results': ProductSerializer(
+            [products[key] for key in data['keys'] if key in products],
+            many=True,
+            fields=data.get('fields'),
+            context={'request': request}
+        ).data,
+        'missing': [key for key in data['keys'] if key not in products],
+    })
+
+
+@query_budget(5)
+@api_view(['GET'])
+@permission_classes([RoleBasedPermission])
+def product_changes(request):
+    """
+    Incremental product sync: products changed since the cursor plus
+    tombstones for deleted and deactivated products
+    """
+    since = request.GET.get('since')
+    try:
+        cursor = decode_cursor(since) if since else None
+        limit = int(request.GET.get('limit', settings.PRODUCT_SYNC_PAGE_SIZE))
+    except (InvalidCursor, ValueError):
+        return Response(
+            {'error': 'Invalid since cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = max(1, min(limit, settings.PRODUCT_SYNC_MAX_PAGE_SIZE))
+
+    changes, next_cursor, has_more = changes_since(cursor, limit)
+
+    products = []
+    tombstones = []
+    for kind, obj in changes:
+        if kind == 'deleted':
+            tombstones.append({
+                'id': obj.product_id, 'sku': obj.sku,
+                'reason': 'deleted', 'changed_at': obj.deleted_at
+            })
+        elif not obj.is_active:
+            tombstones.append({
+                'id': obj.pk, 'sku': obj.sku,
+                'reason': 'deactivated', 'changed_at': obj.updated_at
+            })
+        else:
+            products.append(obj)
+
+    return Response({
+        'results': ProductSerializer(products, many=True).data,
+        'tombstones': tombstones,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    })
+
+
 # Stock Management Views
 class StockLogListView(generics.ListAPIView):
-    queryset = StockLog.objects.select_related('product', 'user')
+    queryset = StockLog.objects.select_related('product', 'user', 'location')
     serializer_class = StockLogSerializer
     permission_classes = [StockLogPermission]
+    pagination_class = EstimatedCountPagination
+    query_budget = 5
     filterset_class = StockLogFilter
     search_fields = ['product__name', 'product__sku', 'reason', 'reference_number']
-    ordering_fields = ['timestamp', 'product__name', 'quantity_change']
+    # Served by indexes (see check_query_plans), except product__name, which
+    # sorts the filtered log: no index on the log holds the product's name
+    ordering_fields = ['timestamp', 'quantity_change', 'product__name']
     ordering = ['-timestamp']
 
 
 class ProductStockLogView(generics.ListAPIView):
     serializer_class = StockLogSerializer
     permission_classes = [StockLogPermission]
+    query_budget = 5
     filterset_class = StockLogFilter
     ordering = ['-timestamp']
 
     def get_queryset(self):
         product_id = self.kwargs['product_id']
-        return StockLog.objects.filter(product_id=product_id).select_related('product', 'user')
+        return StockLog.objects.filter(product_id=product_id).select_related('product', 'user', 'location')
 
 
+@query_budget(33)
 @api_view(['POST'])
 @permission_classes([RoleBasedPermission])
+@idempotent
 def update_product_stock(request, product_id):
     """
     Update product stock with automatic logging
     """
     try:
-        product = Product.objects.get(id=product_id, is_active=True)
+        product = Product.objects.select_related(
+            'category', 'supplier', 'created_by'
+        ).get(id=product_id, is_active=True)
     except Product.DoesNotExist:
         return Response(
             {'error': 'Product not found or inactive'}, 
@@ -142,7 +357,9 @@ def update_product_stock(request, product_id):
                 'stock_log': StockLogSerializer(stock_log).data
             }, status=status.HTTP_200_OK)
             
-        except Exception as e:
+        except serializers.ValidationError as e:
+            # Anything else is a server error: it propagates, so the request's
+            # transaction (and an Idempotency-Key claim) rolls back
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -151,6 +368,79 @@ def update_product_stock(request, product_id):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@query_budget(5)
+@api_view(['GET'])
+@permission_classes([RoleBasedPermission])
+def product_location_stock(request, product_id):
+    """
+    Stock of a product per location, with the part not assigned to one
+    """
+    product = Product.objects.filter(id=product_id).values('id', 'sku', 'quantity').first()
+    if product is None:
+        return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    rows = ProductLocationStock.objects.filter(product_id=product_id).select_related(
+        'product', 'location'
+    ).order_by('location__code')
+    allocated = sum(row.quantity for row in rows)
+    return Response({
+        'product_id': product['id'],
+        'sku': product['sku'],
+        'quantity': product['quantity'],
+        'allocated': allocated,
+        'unassigned': product['quantity'] - allocated,
+        'locations': ProductLocationStockSerializer(rows, many=True).data
+    })
+
+
+class StockAlertListView(generics.ListAPIView):
+    """
+    Low stock crossings recorded by the writes, newest first
+    (``?ordering=id`` for oldest first)
+    """
+    queryset = StockAlert.objects.select_related('product')
+    serializer_class = StockAlertSerializer
+    permission_classes = [RoleBasedPermission]
+    pagination_class = StockAlertPagination
+    query_budget = 3
+    filterset_class = StockAlertFilter
+    ordering_fields = ['id']
+    ordering = ['-id']
+
+
+@query_budget(20)
+@api_view(['POST'])
+@permission_classes([RoleBasedPermission])
+def transfer_product_stock(request):
+    """
+    Move stock between products atomically, with linked transfer logs
+    """
+    serializer = StockTransferSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    try:
+        reference_number, stock_logs = transfer_stock(
+            [(line['from_product'], line['to_product'], line['quantity']) for line in data['lines']],
+            request.user,
+            reason=data.get('reason', ''),
+            reference_number=data.get('reference_number', '')
+        )
+    except serializers.ValidationError as e:
+        return Response(
+            {'error': e.detail[0] if isinstance(e.detail, list) else e.detail},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({
+        'message': 'Stock transferred successfully',
+        'reference_number': reference_number,
+        'stock_logs': StockLogSerializer(stock_logs, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@query_budget(5)
+@throttle_cost('report')
 @api_view(['GET'])
 @permission_classes([RoleBasedPermission])
 def low_stock_products(request):
@@ -160,7 +450,9 @@ def low_stock_products(request):
     low_stock_products = Product.objects.filter(
         is_active=True,
         quantity__lte=F('min_stock_level')
-    ).select_related('category', 'supplier').order_by('quantity')
+    ).select_related(
+        'category', 'supplier', 'created_by', 'last_modified_by'
+    ).order_by('quantity')
     
     serializer = ProductSerializer(low_stock_products, many=True)
     return Response({
@@ -169,73 +461,130 @@ def low_stock_products(request):
     })
 
 
+@query_budget(12)
+@throttle_cost('report')
 @api_view(['GET'])
 @permission_classes([RoleBasedPermission])
 def inventory_report(request):
     """
     Generate comprehensive inventory report
     """
-    # Filter parameters
-    category = request.GET.get('category')
-    supplier = request.GET.get('supplier')
-    
-    # Base queryset
-    products_queryset = Product.objects.all()
-    if category:
-        products_queryset = products_queryset.filter(category__name__icontains=category)
-    if supplier:
-        products_queryset = products_queryset.filter(supplier__name__icontains=supplier)
-
-    # Calculate metrics
-    total_products = products_queryset.count()
-    active_products = products_queryset.filter(is_active=True).count()
-    inactive_products = total_products - active_products
-    
-    # Stock analysis
-    active_products_qs = products_queryset.filter(is_active=True)
-    low_stock_products = active_products_qs.filter(quantity__lte=F('min_stock_level')).count()
-    out_of_stock_products = active_products_qs.filter(quantity=0).count()
-    
-    # Financial metrics
-    stock_value_data = active_products_qs.aggregate(
-        total_value=Sum(F('quantity') * F('price'), default=0),
-        total_quantity=Sum('quantity', default=0)
-    )
-    
-    # Category and supplier counts
-    categories_count = Category.objects.count()
-    suppliers_count = Supplier.objects.count()
-    
-    # Recent stock changes (last 7 days)
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_changes = StockLog.objects.filter(timestamp__gte=week_ago).count()
+    return Response(build_inventory_report(
+        category=request.GET.get('category'),
+        supplier=request.GET.get('supplier')
+    ))
 
-    report_data = {
-        'total_products': total_products,
-        'active_products': active_products,
-        'inactive_products': inactive_products,
-        'low_stock_products': low_stock_products,
-        'out_of_stock_products': out_of_stock_products,
-        'total_stock_value': stock_value_data['total_value'] or 0,
-        'total_quantity': stock_value_data['total_quantity'] or 0,
-        'categories_count': categories_count,
-        'suppliers_count': suppliers_count,
-        'recent_stock_changes': recent_changes,
+
+@query_budget(4)
+@throttle_cost('report')
+@api_view(['GET'])
+@permission_classes([RoleBasedPermission])
+def location_stock_report(request):
+    """
+    Stock count, quantity, value and low stock items per location
+    """
+    # One grouped query over the location stock rows
+    rows = ProductLocationStock.objects.filter(product__is_active=True).values(
+        'location_id', 'location__code', 'location__name', 'location__is_active'
+    ).annotate(
+        products=Count('id'),
+        total_quantity=Sum('quantity'),
+        stock_value=Sum(F('quantity') * F('product__price')),
+        low_stock_count=Count('id', filter=Q(quantity__lte=F('min_stock_level')))
+    ).order_by('location__code')
+
+    unassigned = Product.objects.filter(is_active=True).aggregate(
+        total=Sum('quantity', default=0)
+    )['total'] - sum(row['total_quantity'] for row in rows)
+
+    return Response({
+        'locations': [
+            {
+                'id': row['location_id'],
+                'code': row['location__code'],
+                'name': row['location__name'],
+                'is_active': row['location__is_active'],
+                'products': row['products'],
+                'total_quantity': row['total_quantity'],
+                'stock_value': row['stock_value'],
+                'low_stock_count': row['low_stock_count'],
+            }
+            for row in rows
+        ],
+        'unassigned_quantity': unassigned,
+        'timestamp': timezone.now()
+    })
+
+
+@query_budget(3)
+@throttle_cost('report')
+@api_view(['GET'])
+@permission_classes([RoleBasedPermission])
+def valuation_report(request):
+    """
+    Stock valued at cost (FIFO and weighted average) next to its retail
+    value, per category
+    """
+    # One grouped query over the active products and their valuations
+    rows = Product.objects.filter(is_active=True).values('category_id', 'category__name').annotate(
+        products=Count('id'),
+        total_quantity=Sum('quantity'),
+        fifo_value=Sum('valuation__fifo_value', default=0),
+        average_value=Sum(F('valuation__quantity') * F('valuation__average_cost'), default=0),
+        retail_value=Sum(F('quantity') * F('price')),
+        unvalued_products=Count('id', filter=Q(valuation__isnull=True))
+    ).order_by('category__name')
+
+    totals = {
+        key: sum(row[key] for row in rows)
+        for key in ('products', 'total_quantity', 'fifo_value', 'average_value', 'retail_value', 'unvalued_products')
     }
-    
-    serializer = InventoryReportSerializer(data=report_data)
-    serializer.is_valid()
-    
     return Response({
-        'report': serializer.data,
-        'generated_at': timezone.now(),
-        'filters': {
-            'category': category,
-            'supplier': supplier
-        }
+        **totals,
+        'categories': [
+            {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'products': row['products'],
+                'total_quantity': row['total_quantity'],
+                'fifo_value': row['fifo_value'],
+                'average_value': row['average_value'],
+                'retail_value': row['retail_value'],
+                'unvalued_products': row['unvalued_products'],
+            }
+            for row in rows
+        ],
+        'timestamp': timezone.now()
     })
 
 
+class AbcAnalysisView(generics.ListAPIView):
+    """
+    Active products ranked by stock value (``?basis=value``) or units sold
+    over ``?days=`` days (``?basis=sales``), with their ABC class
+    """
+    serializer_class = AbcClassificationSerializer
+    permission_classes = [RoleBasedPermission]
+    query_budget = 4
+    throttle_cost = 'report'
+
+    def get_queryset(self):
+        basis = self.request.GET.get('basis', settings.ABC_BASIS)
+        if basis not in BASES:
+            raise serializers.ValidationError({'basis': f"Must be one of: {', '.join(BASES)}"})
+        days = self.request.GET.get('days')
+        if days is not None:
+            try:
+                days = int(days)
+            except ValueError:
+                days = 0
+            if days < 1:
+                raise serializers.ValidationError({'days': "Must be a positive number of days"})
+        return classify(basis, days).only('id', 'sku', 'name', 'abc_class')
+
+
+@query_budget(10)
+@throttle_cost('report')
 @api_view(['GET'])
 @permission_classes([RoleBasedPermission])
 def dashboard_stats(request):
@@ -275,4 +624,107 @@ def dashboard_stats(request):
             for cat in top_categories
         ],
         'timestamp': timezone.now()
-    })
\ No newline at end of file
+    })
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+@renderer_classes([PrometheusRenderer])
+def metrics(request):
+    """
+    Request metrics of all workers in Prometheus text format
+    """
+    return Response(render_prometheus())
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def profile_report(request, profile_id):
+    """
+    Download a stored request profile
+    """
+    report = load_report(profile_id)
+    if report is None:
+        return Response(
+            {'error': 'Profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(report)
+
+
+# Background Report Jobs
+class ReportJobQuerysetMixin:
+    serializer_class = ReportJobSerializer
+    permission_classes = [ReportJobPermission]
+
+    def get_queryset(self):
+        queryset = ReportJob.objects.select_related('created_by')
+        if self.request.user.is_admin:
+            return queryset
+        return queryset.filter(created_by=self.request.user)
+
+
+class ReportJobListCreateView(ReportJobQuerysetMixin, generics.ListCreateAPIView):
+    """
+    Queue a report or export job, or list your jobs
+    """
+    query_budget = 5
+    filterset_fields = ['kind', 'status']
+    ordering_fields = ['created_at', 'finished_at']
+    ordering = ['-created_at']
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by=request.user)
+        # Accepted: the result is built by the run_report_jobs worker
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': f"/api/jobs/{job.pk}/"}
+        )
+
+
+class ReportJobDetailView(ReportJobQuerysetMixin, generics.RetrieveDestroyAPIView):
+    """
+    Poll a job's status, or delete it together with its result
+    """
+    query_budget = 5
+
+    def perform_destroy(self, instance):
+        if instance.result_file:
+            try:
+                os.remove(job_result_path(instance))
+            except FileNotFoundError:
+                pass
+        instance.delete()
+
+
+class ReportJobDownloadView(ReportJobQuerysetMixin, generics.RetrieveAPIView):
+    """
+    Download the result file of a finished job
+    """
+    query_budget = 3
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != 'succeeded':
+            return Response(
+                {'error': f'Job is {job.status}, no result to download'},
+                status=status.HTTP_409_CONFLICT
+            )
+        try:
+            result = open(job_result_path(job), 'rb')
+        except FileNotFoundError:
+            return Response(
+                {'error': 'Result has expired'},
+                status=status.HTTP_410_GONE
+            )
+        return FileResponse(
+            result,
+            as_attachment=True,
+            filename=f"{job.kind}-{job.created_at:%Y%m%d-%H%M%S}.{job.result_file.rsplit('.', 1)[-1]}",
+            content_type=job_content_type(job)
+        )
@@ -0,0 +1,96 @@
+"""
+Worker warm-up, called from ``gunicorn.conf.py``.
+
+Django, DRF and the ORM initialise a lot lazily: the URL patterns compile
+their regexes on first match, model ``_meta`` builds its field caches on
+first use, DRF imports the classes named in its settings on first access
+and serializers build their fields on first access. Without a warm-up the
+first requests of every new worker pay for all of it.
+"""
+import inspect
+import logging
+import time
+
+from django.apps import apps
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import serializers as drf_serializers
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+# Leading SKU index entries read per worker; bounded for large catalogs
+WARMUP_SKUS = 10000
+
+DRF_CLASS_SETTINGS = (
+    'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES',
+    'DEFAULT_THROTTLE_CLASSES',
+    'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES',
+    'DEFAULT_FILTER_BACKENDS',
+    'DEFAULT_PAGINATION_CLASS',
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+    'EXCEPTION_HANDLER',
+)
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def warm_up_code():
+    """
+    Initialise everything that is the same in every worker. Run once in
+    the master before forking (``preload_app``); workers share the result.
+    """
+    started = time.perf_counter()
+
+    resolver = get_resolver()
+    # Populates the reverse lookup tables and compiles every pattern
+    resolver.reverse_dict
+    patterns = list(iter_patterns(resolver.url_patterns))
+    for pattern in patterns:
+        pattern.pattern.regex
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    for name in DRF_CLASS_SETTINGS:
+        getattr(api_settings, name)
+
+    from . import serializers
+    serializer_classes = [
+        cls for _, cls in inspect.getmembers(serializers, inspect.isclass)
+        if issubclass(cls, drf_serializers.Serializer) and cls.__module__ == serializers.__name__
+    ]
+    for serializer_class in serializer_classes:
+        serializer_class().fields
+
+    # Forked workers must not share the master's database connections
+    connections.close_all()
+    logger.info(
+        "Warmed up %d URL patterns and %d serializers in %.0f ms",
+        len(patterns), len(serializer_classes), (time.perf_counter() - started) * 1000
+    )
+
+
+def warm_up_database():
+    """
+    Run the lookups every request path starts with, once per worker: checks
+    the database is reachable and pulls the category, supplier and SKU index
+    pages into the database's cache. The connection is not kept: Django's
+    are per thread, and request threads open their own.
+    """
+    from .models import Category, Product, Supplier
+
+    started = time.perf_counter()
+    list(Category.objects.values_list('id', 'name'))
+    list(Supplier.objects.values_list('id', 'name'))
+    list(Product.objects.order_by('sku').values_list('sku', flat=True)[:WARMUP_SKUS])
+    connections.close_all()
+    logger.info("Warmed up the database in %.0f ms", (time.perf_counter() - started) * 1000)
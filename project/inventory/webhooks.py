@@ -0,0 +1,172 @@
+import hashlib
+import hmac
+import json
+import logging
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutboxEvent, WebhookEndpoint
+
+logger = logging.getLogger(__name__)
+
+STOCK_CHANGED = 'stock.changed'
+
+
+def stock_log_payload(stock_log):
+    """Build the outbox payload for a stock log entry"""
+    return {
+        'stock_log_id': stock_log.id,
+        'product_id': stock_log.product_id,
+        'sku': stock_log.product.sku,
+        'location_id': stock_log.location_id,
+        'action': stock_log.action,
+        'quantity_change': stock_log.quantity_change,
+        'previous_quantity': stock_log.previous_quantity,
+        'new_quantity': stock_log.new_quantity,
+        'reference_number': stock_log.reference_number,
+        'unit_cost': str(stock_log.unit_cost) if stock_log.unit_cost is not None else None,
+        'user_id': stock_log.user_id,
+        'timestamp': stock_log.timestamp.isoformat(),
+    }
+
+
+def enqueue_stock_event(stock_log):
+    """
+    Record a stock movement in the outbox.
+
+    Must be called inside the transaction that wrote the stock log so the
+    event is committed (or rolled back) together with it.
+    """
+    return OutboxEvent.objects.create(
+        event_type=STOCK_CHANGED,
+        payload=stock_log_payload(stock_log)
+    )
+
+
+def enqueue_stock_events(stock_logs):
+    """Bulk variant of ``enqueue_stock_event``, same transaction rules apply"""
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=STOCK_CHANGED, payload=stock_log_payload(stock_log))
+        for stock_log in stock_logs
+    ])
+
+
+class WebhookDispatcher:
+    """
+    Drains the outbox in batches and POSTs them to every active endpoint
+    """
+
+    def __init__(self, batch_size=None, workers=None, timeout=None):
+        self.batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+        self.workers = workers or settings.WEBHOOK_WORKERS
+        self.timeout = timeout or settings.WEBHOOK_TIMEOUT
+
+    def due_endpoints(self):
+        now = timezone.now()
+        return [
+            endpoint for endpoint in WebhookEndpoint.objects.filter(is_active=True)
+            if endpoint.next_attempt_at is None or endpoint.next_attempt_at <= now
+        ]
+
+    def dispatch_once(self):
+        """
+        Deliver one batch to each due endpoint. Returns the number of events
+        delivered across all endpoints.
+        """
+        endpoints = self.due_endpoints()
+        if not endpoints:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            delivered = sum(executor.map(self._deliver_batch, endpoints))
+
+        self.prune()
+        return delivered
+
+    def prune(self):
+        """
+        Delete events already delivered to every endpoint. Inactive endpoints
+        count too, so one that is reactivated gets its backlog.
+        """
+        cursor = WebhookEndpoint.objects.aggregate(cursor=Min('last_event_id'))['cursor']
+        if cursor:
+            OutboxEvent.objects.filter(id__lte=cursor).delete()
+
+    def _deliver_batch(self, endpoint):
+        try:
+            # Ids are taken at insert but committed out of order; events still
+            # settling are left for the next batch so the cursor cannot pass
+            # one that commits late
+            horizon = timezone.now() - timedelta(seconds=settings.WEBHOOK_SETTLE_SECONDS)
+            events = list(
+                OutboxEvent.objects.filter(id__gt=endpoint.last_event_id, created_at__lte=horizon)
+                .order_by('id')[:self.batch_size]
+            )
+            if not events:
+                return 0
+
+            try:
+                self.post(endpoint, self.build_payload(events))
+            except (urllib.error.URLError, OSError) as e:
+                self._record_failure(endpoint, e)
+                return 0
+
+            WebhookEndpoint.objects.filter(pk=endpoint.pk).update(
+                last_event_id=events[-1].id,
+                failure_count=0,
+                next_attempt_at=None,
+                last_error=''
+            )
+            return len(events)
+        finally:
+            # Worker threads open their own connections
+            close_old_connections()
+
+    def build_payload(self, events):
+        return {
+            'events': [
+                {
+                    'id': event.id,
+                    'type': event.event_type,
+                    'created_at': event.created_at,
+                    'data': event.payload,
+                }
+                for event in events
+            ],
+            'cursor': events[-1].id,
+        }
+
+    def post(self, endpoint, payload):
+        body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+        headers = {'Content-Type': 'application/json'}
+        if endpoint.secret:
+            signature = hmac.new(endpoint.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers['X-Webhook-Signature'] = f"sha256={signature}"
+
+        request = urllib.request.Request(endpoint.url, data=body, headers=headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _record_failure(self, endpoint, error):
+        failure_count = endpoint.failure_count + 1
+        delay = min(
+            settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (failure_count - 1),
+            settings.WEBHOOK_RETRY_MAX_SECONDS
+        )
+        logger.warning(
+            "Webhook delivery to %s failed (attempt %d), retrying in %ds: %s",
+            endpoint.name, failure_count, delay, error
+        )
+        WebhookEndpoint.objects.filter(pk=endpoint.pk).update(
+            failure_count=failure_count,
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+            last_error=str(error)[:1000]
+        )
@@ -0,0 +1,15 @@
+"""
+ASGI config for stock_management project.
+
+Serves the async read path (reports, low stock, product and stock log
+lists), e.g. ``gunicorn stock_management.asgi:application -k uvicorn.workers.UvicornWorker``
+"""
+import os
+
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_management.settings')
+os.environ.setdefault('ASYNC_READ_PATH', 'True')
+
+application = ASGIStaticFilesHandler(get_asgi_application())
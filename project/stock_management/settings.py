@@ -39,6 +39,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'inventory.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -46,6 +47,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # After authentication, so admins logged in by session can profile too
+    'inventory.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,15 +72,31 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'stock_management.wsgi.application'
+ASGI_APPLICATION = 'stock_management.asgi.application'
+
+# ASGI deployment mode: async report/list views (enabled by stock_management.asgi)
+ASYNC_READ_PATH = config('ASYNC_READ_PATH', default=False, cast=bool)
+if ASYNC_READ_PATH:
+    # WhiteNoise is sync-only and would pin a thread per request; static
+    # files are served by the ASGI static handler instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
 
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        # Seconds a connection is reused across requests (0 = one per request)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
     }
 }
 
+# Single-node SQLite profile: WAL, relaxed fsync, BEGIN IMMEDIATE for transactions
+SQLITE_TUNING = config('SQLITE_TUNING', default=False, cast=bool)
+SQLITE_BUSY_TIMEOUT_MS = config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
+SQLITE_CACHE_SIZE_KB = config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'inventory.User'
 
@@ -129,6 +148,9 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'inventory.throttling.RoleFixedWindowThrottle',
+    ],
 }
 
 # JWT Settings
@@ -188,3 +210,116 @@ LOGGING = {
 
 # Low Stock Threshold (configurable)
 LOW_STOCK_THRESHOLD = config('LOW_STOCK_THRESHOLD', default=10, cast=int)
+
+# Webhook dispatcher (see `manage.py dispatch_webhooks`)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=100, cast=int)
+WEBHOOK_WORKERS = config('WEBHOOK_WORKERS', default=4, cast=int)
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10, cast=int)
+WEBHOOK_RETRY_BASE_SECONDS = config('WEBHOOK_RETRY_BASE_SECONDS', default=5, cast=int)
+WEBHOOK_RETRY_MAX_SECONDS = config('WEBHOOK_RETRY_MAX_SECONDS', default=600, cast=int)
+# Events younger than this wait for the next batch: a transaction still
+# committing may hold a lower event id than one already delivered
+WEBHOOK_SETTLE_SECONDS = config('WEBHOOK_SETTLE_SECONDS', default=2, cast=int)
+
+# Product delta sync (/api/products/changes/)
+PRODUCT_SYNC_PAGE_SIZE = config('PRODUCT_SYNC_PAGE_SIZE', default=100, cast=int)
+PRODUCT_SYNC_MAX_PAGE_SIZE = config('PRODUCT_SYNC_MAX_PAGE_SIZE', default=1000, cast=int)
+# Rows changed within this window are held back until in-flight writes commit
+PRODUCT_SYNC_SETTLE_SECONDS = config('PRODUCT_SYNC_SETTLE_SECONDS', default=2, cast=int)
+
+# Request metrics exposed at /api/metrics
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Shared directory where gunicorn workers publish their totals (empty = single process)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+
+# Per-view query budgets: raise on violations in DEBUG/tests, log and count them otherwise
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=DEBUG, cast=bool)
+# Identical SELECTs repeated this many times in one request are reported as N+1
+QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', default=5, cast=int)
+
+# On-demand request profiling (?_profile=cprofile, admins only)
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILE_MAX_REPORTS = config('PROFILE_MAX_REPORTS', default=50, cast=int)
+PROFILE_TOP_FUNCTIONS = config('PROFILE_TOP_FUNCTIONS', default=40, cast=int)
+
+# Slow query log (viewable in the admin under "Slow queries")
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=int)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = config('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', default=0.1, cast=float)
+SLOW_QUERY_LOG_MAX_ROWS = config('SLOW_QUERY_LOG_MAX_ROWS', default=1000, cast=int)
+
+# Background report jobs (see `manage.py run_report_jobs`)
+REPORT_JOB_DIR = config('REPORT_JOB_DIR', default=str(BASE_DIR / 'report_jobs'))
+REPORT_JOB_CONCURRENCY = config('REPORT_JOB_CONCURRENCY', default=2, cast=int)
+# Results (and failed jobs) are deleted this long after the job finished
+REPORT_JOB_TTL_SECONDS = config('REPORT_JOB_TTL_SECONDS', default=86400, cast=int)
+# Jobs running longer than this are assumed to have lost their worker
+REPORT_JOB_TIMEOUT_SECONDS = config('REPORT_JOB_TIMEOUT_SECONDS', default=3600, cast=int)
+
+# Striped stock counters (see `manage.py fold_stock_shards`)
+# Pending changes younger than this are left for the next fold, so changes
+# still committing are folded in ledger order
+STOCK_FOLD_SETTLE_SECONDS = config('STOCK_FOLD_SETTLE_SECONDS', default=1, cast=int)
+STOCK_FOLD_INTERVAL = config('STOCK_FOLD_INTERVAL', default=1.0, cast=float)
+
+# Group commit: stock updates are queued and applied in batches by a writer thread
+STOCK_GROUP_COMMIT = config('STOCK_GROUP_COMMIT', default=False, cast=bool)
+# How long the writer collects updates before committing them together
+STOCK_GROUP_COMMIT_WINDOW_MS = config('STOCK_GROUP_COMMIT_WINDOW_MS', default=5, cast=float)
+STOCK_GROUP_COMMIT_MAX_BATCH = config('STOCK_GROUP_COMMIT_MAX_BATCH', default=200, cast=int)
+# Seconds a request waits for its batch to commit
+STOCK_GROUP_COMMIT_TIMEOUT = config('STOCK_GROUP_COMMIT_TIMEOUT', default=10, cast=float)
+
+# Low stock alerts (/api/stock/alerts/): polls with ?after= leave alerts
+# younger than this for the next poll, as transactions still committing
+# may hold lower ids
+STOCK_ALERT_SETTLE_SECONDS = config('STOCK_ALERT_SETTLE_SECONDS', default=2, cast=int)
+
+# Idempotency-Key on stock updates and product creation: stored responses
+# are replayed this long (`manage.py purge_idempotency_keys` deletes them after)
+IDEMPOTENCY_KEY_TTL_SECONDS = config('IDEMPOTENCY_KEY_TTL_SECONDS', default=86400, cast=int)
+
+# Stock transfers (/api/stock/transfers/)
+STOCK_TRANSFER_MAX_LINES = config('STOCK_TRANSFER_MAX_LINES', default=50, cast=int)
+# Attempts before a transfer that keeps hitting deadlocks/serialization failures gives up
+STOCK_TRANSFER_MAX_ATTEMPTS = config('STOCK_TRANSFER_MAX_ATTEMPTS', default=5, cast=int)
+
+# Batch product fetch (/api/products/batch/)
+PRODUCT_BATCH_MAX_KEYS = config('PRODUCT_BATCH_MAX_KEYS', default=200, cast=int)
+
+# Product and stock log list counts: exact up to the threshold, estimated above
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+# Without planner estimates (SQLite), large counts are cached this long
+ESTIMATED_COUNT_CACHE_SECONDS = config('ESTIMATED_COUNT_CACHE_SECONDS', default=60, cast=int)
+
+# ABC classification (/api/reports/abc/ and `manage.py refresh_abc_classes`)
+# Stored class basis: 'value' (quantity * price) or 'sales' (units sold)
+ABC_BASIS = config('ABC_BASIS', default='value')
+ABC_SALES_DAYS = config('ABC_SALES_DAYS', default=90, cast=int)
+ABC_CLASS_A_PERCENT = config('ABC_CLASS_A_PERCENT', default=80, cast=int)
+ABC_CLASS_B_PERCENT = config('ABC_CLASS_B_PERCENT', default=95, cast=int)
+
+# Cache; throttle counters must be shared by every worker process, so use
+# Redis or Memcached when running more than one
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# API throttling: cost units per role per fixed window
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_RATES = {
+    'admin': config('THROTTLE_RATE_ADMIN', default='3000/min'),
+    'staff': config('THROTTLE_RATE_STAFF', default='1200/min'),
+    'viewer': config('THROTTLE_RATE_VIEWER', default='600/min'),
+    # Unauthenticated requests (token login), per client IP
+    'anon': config('THROTTLE_RATE_ANON', default='60/min'),
+}
+# Units a request costs, by kind; views declare `throttle_cost`
+THROTTLE_COSTS = {
+    'read': config('THROTTLE_COST_READ', default=1, cast=int),
+    'write': config('THROTTLE_COST_WRITE', default=3, cast=int),
+    'report': config('THROTTLE_COST_REPORT', default=30, cast=int),
+}
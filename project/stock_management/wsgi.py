@@ -0,0 +1,10 @@
+"""
+WSGI config for stock_management project.
+"""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_management.settings')
+
+application = get_wsgi_application()